@@ -1,14 +1,116 @@
 from __future__ import annotations
 
+import asyncio
+import bz2
+import codecs
 import csv
+import gc
+import gzip
+import heapq
+import io
+import json
+import lzma
+import math
+import mmap
+import multiprocessing
+import operator
+import os
+import re
+import time
+from bisect import bisect_right
 from collections import Counter
-from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, astuple, dataclass, field, replace
+from hashlib import blake2b
+from itertools import islice, repeat
 from pathlib import Path
+from typing import Iterator
 
 from mcp.server.fastmcp import FastMCP
 
+try:  # Python 3.14+
+    from compression import zstd as _zstd
+except ImportError:
+    _zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 mcp = FastMCP("CSV Inspector")
 
+# Whole-file scans of files at least this large are split across processes.
+_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+_WORKERS = int(os.getenv("CSV_INSPECTOR_WORKERS", "0")) or os.cpu_count() or 1
+_READ_BLOCK = 1024 * 1024
+_QUOTE = b'"'
+
+_executor: ProcessPoolExecutor | None = None
+
+
+_QUANTILE_K = 400
+_QUANTILES = (0.25, 0.5, 0.75)
+
+
+@dataclass
+class _Quantiles:
+    """KLL quantile sketch: levels[h] holds samples that each stand for 2**h values.
+
+    A level over its capacity is sorted and every other sample is promoted to
+    the next level, so about 3k samples are kept and the rank error is around
+    1.7 / k of the count. Sketches merge by pooling levels.
+    """
+
+    k: int = _QUANTILE_K
+    levels: list[list[float]] = field(default_factory=lambda: [[]])
+    coin: int = 0
+
+    def add_values(self, values: list[float]) -> None:
+        self.levels[0].extend(values)
+        self._compress()
+
+    def merge(self, other: _Quantiles) -> None:
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append([])
+            self.levels[h].extend(items)
+        self._compress()
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            # Lower levels get geometrically smaller capacities.
+            if len(level) > max(2, int(self.k * (2 / 3) ** (len(self.levels) - 1 - h))):
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                level.sort()
+                keep = [level.pop()] if len(level) % 2 else []
+                # Alternate which half is promoted instead of flipping a random coin,
+                # so equal inputs give equal sketches.
+                self.coin ^= 1
+                self.levels[h + 1].extend(level[self.coin :: 2])
+                self.levels[h] = keep
+            h += 1
+
+    def quantile(self, q: float) -> float | None:
+        items = sorted((v, 1 << h) for h, level in enumerate(self.levels) for v in level)
+        target = q * sum(w for _, w in items)
+        seen = 0
+        for v, w in items:
+            seen += w
+            if seen >= target:
+                return v
+        return None
+
 
 @dataclass
 class _ColStats:
@@ -19,6 +121,79 @@ class _ColStats:
     floats: int = 0
     bools: int = 0
     strings: int = 0
+    # Distribution stats. The chunked and per-value paths accumulate them in
+    # different orders, so only the type counts above take part in equality.
+    numbers: int = field(default=0, compare=False)
+    mean: float = field(default=0.0, compare=False)
+    m2: float = field(default=0.0, compare=False)
+    low: float | None = field(default=None, compare=False)
+    high: float | None = field(default=None, compare=False)
+    quantiles: _Quantiles = field(default_factory=_Quantiles, compare=False)
+    lengths: int = field(default=0, compare=False)
+    length_total: int = field(default=0, compare=False)
+    shortest: int | None = field(default=None, compare=False)
+    longest: int | None = field(default=None, compare=False)
+
+    def add(self, kind: str, count: int = 1) -> None:
+        self.seen += count
+        if kind == "missing":
+            self.missing += count
+        elif kind == "int":
+            self.ints += count
+        elif kind == "float":
+            self.floats += count
+        elif kind == "bool":
+            self.bools += count
+        else:
+            self.strings += count
+
+    def merge(self, other: _ColStats) -> None:
+        self.seen += other.seen
+        self.missing += other.missing
+        self.ints += other.ints
+        self.floats += other.floats
+        self.bools += other.bools
+        self.strings += other.strings
+        if other.numbers:
+            self._add_moments(other.numbers, other.mean, other.m2, other.low, other.high)
+        self.quantiles.merge(other.quantiles)
+        if other.lengths:
+            self._add_lengths(other.lengths, other.length_total, other.shortest, other.longest)
+
+    def add_numbers(self, nums: list[float]) -> None:
+        """Fold a batch of finite numbers into the moments, extremes and quantiles."""
+        if not nums:
+            return
+        n = len(nums)
+        mean = math.fsum(nums) / n
+        # Sorting gives the extremes and makes the sketch's own sort cheap.
+        nums.sort()
+        self._add_moments(n, mean, math.fsum([(x - mean) ** 2 for x in nums]), nums[0], nums[-1])
+        self.quantiles.add_values(nums)
+
+    def _add_moments(self, n: int, mean: float, m2: float, low: float, high: float) -> None:
+        # Welford's update generalised to batches (Chan et al.), so chunks and
+        # worker results combine without a second pass.
+        total = self.numbers + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.numbers * n / total
+        self.numbers = total
+        self.low = low if self.low is None else min(self.low, low)
+        self.high = high if self.high is None else max(self.high, high)
+
+    def add_lengths(self, lens: list[int]) -> None:
+        if lens:
+            self._add_lengths(len(lens), sum(lens), min(lens), max(lens))
+
+    def _add_lengths(self, n: int, total: int, shortest: int, longest: int) -> None:
+        self.lengths += n
+        self.length_total += total
+        self.shortest = shortest if self.shortest is None else min(self.shortest, shortest)
+        self.longest = longest if self.longest is None else max(self.longest, longest)
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.numbers - 1)) if self.numbers > 1 else 0.0
 
     def infer_type(self) -> str:
         non_missing = self.seen - self.missing
@@ -33,6 +208,68 @@ class _ColStats:
         return max(cands, key=cands.get)
 
 
+# Approximate top values: heavy-hitter counters kept, rows counted per update,
+# and HyperLogLog precision (2**_HLL_P registers).
+_SKETCH_CAPACITY = 4096
+_SKETCH_CHUNK_ROWS = 65536
+_HLL_P = 14
+
+
+@dataclass
+class _ValueSketch:
+    """Bounded-memory summary of a column's values.
+
+    Heavy hitters use the mergeable Misra-Gries summary (the deterministic
+    Space-Saving family): every kept count is at most ``error`` below the true
+    count, and error <= total / (capacity + 1). Distinct values are estimated
+    with HyperLogLog, standard error 1.04 / sqrt(2**_HLL_P).
+    """
+
+    capacity: int = _SKETCH_CAPACITY
+    counts: Counter = field(default_factory=Counter)
+    error: int = 0
+    total: int = 0
+    registers: bytearray = field(default_factory=lambda: bytearray(1 << _HLL_P))
+
+    def add_counts(self, chunk: Counter[str]) -> None:
+        self.total += sum(chunk.values())
+        for v in chunk:
+            self._add_hash(v)
+        self.counts.update(chunk)
+        self._prune()
+
+    def merge(self, other: _ValueSketch) -> None:
+        self.total += other.total
+        self.error += other.error
+        self.counts.update(other.counts)
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._prune()
+
+    def _prune(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        cut = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.error += cut
+        self.counts = Counter({v: c - cut for v, c in self.counts.items() if c > cut})
+
+    def _add_hash(self, value: str) -> None:
+        # A stable hash, so registers from worker processes can be merged.
+        h = int.from_bytes(blake2b(value.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+        bits = 64 - _HLL_P
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        idx = h >> bits
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def distinct(self) -> int:
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
 def _csv_path(file_path: str) -> Path:
     p = Path(file_path).expanduser()
     if not p.exists() or not p.is_file():
@@ -45,6 +282,36 @@ def _is_missing(v: str) -> bool:
     return s == "" or s.lower() in {"na", "n/a", "null", "none"}
 
 
+def _ci(word: str) -> str:
+    # ASCII-only case folding, matching str.lower() on these words.
+    return "".join(f"[{ch}{ch.upper()}]" if ch.isalpha() else re.escape(ch) for ch in word)
+
+
+# Column values are classified a chunk at a time: the values of a column are
+# joined into one newline-delimited buffer and each category is counted with
+# a single regex scan over it. Every pattern matches the empty string at the
+# "\n" in front of a value of its category, so findall() only returns cached
+# one-character strings. The patterns mirror _classify_value exactly.
+_PROFILE_CHUNK_ROWS = 8192
+_WS = r"[^\S\n]*"
+_DIGITS = r"\d+(?:_\d+)*"
+
+
+def _value_re(body: str) -> re.Pattern[str]:
+    return re.compile(rf"\n(?={_WS}(?:{body}){_WS}\n)")
+
+
+_MISSING_RE = _value_re(f"(?:{'|'.join(_ci(w) for w in ('na', 'n/a', 'null', 'none'))})?")
+_BOOL_RE = _value_re("|".join(_ci(w) for w in ("true", "false", "yes", "no")))
+_INT_RE = _value_re(rf"[+-]?{_DIGITS}")
+_LEADING_ZERO_RE = _value_re(r"0\d+")
+_ZERO_PADDED_RE = re.compile(r"\s*0\d+\s*")
+_FLOAT_RE = _value_re(
+    rf"[+-]?(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?"
+    rf"|{_ci('infinity')}|{_ci('inf')}|{_ci('nan')})"
+)
+
+
 def _classify_value(v: str) -> str:
     s = (v or "").strip()
     if _is_missing(s):
@@ -67,15 +334,1520 @@ def _classify_value(v: str) -> str:
         return "string"
 
 
+def _finite_numbers(values: tuple[str, ...] | list[str]) -> list[float]:
+    try:
+        nums = list(map(float, values))
+    except ValueError:
+        nums = [x for x in map(_as_number, filter(_NUMBER_START_RE.match, values)) if x is not None]
+    if not math.isfinite(sum(nums)):
+        nums = [x for x in nums if math.isfinite(x)]
+    return nums
+
+
+def _profile_values(c: _ColStats, counts) -> None:
+    """Classify (value, count) pairs one at a time."""
+    nums: list[float] = []
+    lens: list[int] = []
+    for v, count in counts:
+        kind = _classify_value(v)
+        c.add(kind, count)
+        if kind == "missing":
+            continue
+        lens += [len(v)] * count
+        if kind == "int" or kind == "float":
+            nums += _finite_numbers([v]) * count
+    c.add_numbers(nums)
+    c.add_lengths(lens)
+
+
+def _profile_chunk(cols: list[_ColStats], rows: list[list[str]]) -> None:
+    """Add one chunk of rows (already padded/truncated to the header) to cols."""
+    for c, values in zip(cols, zip(*rows)):
+        n = len(values)
+        distinct = Counter(values)
+        if len(distinct) * 4 <= n:
+            # Low-cardinality column: classify each distinct value once.
+            _profile_values(c, distinct.items())
+            continue
+
+        buf = "\n" + "\n".join(values) + "\n"
+        if buf.count("\n") != n + 1:
+            # Embedded newlines would split values; classify them one by one.
+            _profile_values(c, ((v, 1) for v in values))
+            continue
+
+        # Skip scans whose count is already known to be zero.
+        missing = len(_MISSING_RE.findall(buf))
+        numeric = len(_FLOAT_RE.findall(buf)) if missing < n else 0
+        ints = len(_INT_RE.findall(buf)) if numeric else 0
+        leading_zero = len(_LEADING_ZERO_RE.findall(buf)) if ints else 0
+        bools = len(_BOOL_RE.findall(buf)) if missing + numeric < n else 0
+        c.seen += n
+        c.missing += missing
+        c.bools += bools
+        c.ints += ints - leading_zero
+        c.floats += numeric - ints
+        c.strings += n - missing - bools - numeric + leading_zero
+        c.add_lengths([len(v) for v in values if not _is_missing(v)] if missing else list(map(len, values)))
+        if numeric:
+            if leading_zero:
+                # Zero-padded IDs are strings (see _classify_value), not numbers.
+                values = [v for v in values if not _ZERO_PADDED_RE.fullmatch(v)]
+            c.add_numbers(_finite_numbers(values))
+
+
+def _profile_rows(cols: list[_ColStats], rows_iter: Iterator[list[str]]) -> int:
+    """Profile rows into cols a chunk at a time; return the number of rows."""
+    width = len(cols)
+    pad = [""] * width
+    n_rows = 0
+    with _no_gc():
+        while True:
+            rows = list(islice(rows_iter, _PROFILE_CHUNK_ROWS))
+            if not rows:
+                return n_rows
+            n_rows += len(rows)
+            rows = [r if len(r) == width else (r + pad)[:width] for r in rows]
+            _profile_chunk(cols, rows)
+
+
+def _count_values(rows_iter: Iterator[list[str]], idx: int) -> tuple[Counter[str], int]:
+    counts: Counter[str] = Counter()
+    scanned = 0
+    for row in rows_iter:
+        scanned += 1
+        v = row[idx] if idx < len(row) else ""
+        if _is_missing(v):
+            continue
+        counts[v.strip()] += 1
+    return counts, scanned
+
+
+def _sketch_values(rows_iter: Iterator[list[str]], idx: int) -> tuple[_ValueSketch, int]:
+    sketch = _ValueSketch()
+    scanned = 0
+    while True:
+        chunk, n = _count_values(islice(rows_iter, _SKETCH_CHUNK_ROWS), idx)
+        if not n:
+            return sketch, scanned
+        scanned += n
+        sketch.add_counts(chunk)
+
+
+def _find_column(header: list[str], column: str) -> int | None:
+    for i, h in enumerate(header):
+        if h == column:
+            return i
+    for i, h in enumerate(header):
+        if h.strip().lower() == column.strip().lower():
+            return i
+    return None
+
+
+# Parallel scans
+# --------------
+#
+# The data section is cut into one byte range per worker. Each cut is moved
+# forward to the next record boundary: the next newline that is not inside a
+# quoted field. Whether a position is inside quotes follows from the parity of
+# the quote characters before it, which is exact for RFC 4180 files (fields
+# are quoted whole and embedded quotes are doubled). Workers then parse their
+# range independently and the parent merges the partial results.
+
+
+def _count_quotes(path: str, start: int, end: int) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(_READ_BLOCK, remaining))
+            if not block:
+                break
+            count += block.count(_QUOTE)
+            remaining -= len(block)
+    return count
+
+
+def _record_end(f, pos: int, in_quotes: bool) -> int:
+    """Return the offset just past the first record terminator at or after pos."""
+    f.seek(pos)
+    while True:
+        block = f.read(_READ_BLOCK)
+        if not block:
+            return pos
+        start = 0
+        while True:
+            nl = block.find(b"\n", start)
+            if nl < 0:
+                in_quotes ^= bool(block.count(_QUOTE, start) & 1)
+                break
+            in_quotes ^= bool(block.count(_QUOTE, start, nl) & 1)
+            if not in_quotes:
+                return pos + nl + 1
+            start = nl + 1
+        pos += len(block)
+
+
+@contextmanager
+def _mapped(path: str | Path) -> Iterator[mmap.mmap | bytes]:
+    """Map path read-only (an empty file maps to b"")."""
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+        with mm:
+            yield mm
+
+
+def _iter_range_lines(
+    path: str, start: int, end: int, encoding: str = "utf-8", quotes: list[int] | None = None
+) -> Iterator[str]:
+    """Yield the text lines of bytes [start, end) of path, as open(newline="") would.
+
+    The file is mapped and decoded a block at a time as lines are consumed.
+    If given, quotes[0] counts the quote characters in the blocks read.
+    """
+    with _mapped(path) as mm:
+        end = min(end, len(mm))
+        pos = start
+        while pos < end:
+            stop = min(pos + _READ_BLOCK, end)
+            cut = mm.rfind(b"\n", pos, stop) + 1
+            if cut <= pos:
+                cut = mm.find(b"\n", stop, end) + 1 or end
+            chunk = mm[pos:cut]
+            if quotes is not None:
+                quotes[0] += chunk.count(_QUOTE)
+            # Cuts fall on newlines, so multi-byte characters are never split.
+            yield from io.StringIO(chunk.decode(encoding, errors="replace"), newline="")
+            pos = cut
+
+
+# Range functions return (result, rows, quotes): the number of quote characters
+# they read, which covers the whole range when fewer than ``limit`` rows were
+# returned.
+
+
+def _profile_range(
+    path: str, start: int, end: int, dialect: _Dialect, names: list[str], limit: int | None = None
+) -> tuple[list[_ColStats], int, int]:
+    cols = [_ColStats(name=n) for n in names]
+    quotes = [0]
+    reader = dialect.reader(_iter_range_lines(path, start, end, dialect.encoding, quotes))
+    rows = _profile_rows(cols, islice(reader, limit))
+    return cols, rows, quotes[0]
+
+
+def _values_range(
+    path: str, start: int, end: int, dialect: _Dialect, idx: int, approximate: bool, limit: int | None = None
+) -> tuple[Counter[str] | _ValueSketch, int, int]:
+    quotes = [0]
+    reader = dialect.reader(_iter_range_lines(path, start, end, dialect.encoding, quotes))
+    count_fn = _sketch_values if approximate else _count_values
+    return *count_fn(islice(reader, limit), idx), quotes[0]
+
+
+# Row index
+# ---------
+#
+# csv_rows seeks with a sparse index of checkpoints, one per _INDEX_BLOCK of
+# the file. Counting the records in a block does not need a parser: quoted
+# fields are replaced by a marker byte with one regex substitution and the
+# newlines left are record terminators. That only holds if every quote opens
+# or closes a whole field; csv.reader keeps a quote inside an unquoted field
+# (5" tall) as text. A marker not bounded by delimiters or line breaks on both
+# sides therefore makes the index inexact, and csv_rows rebuilds it with
+# csv.reader instead (_index_records).
+
+_INDEX_BLOCK = 1024 * 1024
+# Rows before this are read from the start of the data instead of via the index.
+_INDEX_MIN_ROW = 10_000
+# A quoted field, with its doubled quotes
+_QUOTED_RE = re.compile(rb'"[^"]*"(?:"[^"]*")*')
+_MARK = b"\x00"
+
+
+def _stray_quotes(block: bytes, delimiter: bytes) -> bool:
+    """Tell whether a block with its quoted fields marked has a quote inside a field."""
+    marks = block.count(_MARK)
+    if marks:
+        seps = (delimiter, b"\n", b"\r")
+        before = sum(block.count(s + _MARK) for s in seps) + block.startswith(_MARK)
+        after = sum(block.count(_MARK + s) for s in (*seps, _QUOTE)) + block.endswith(_MARK)
+        if before != marks or after != marks:
+            return True
+    j = block.find(_QUOTE)
+    return j > 0 and block[j - 1 : j] not in (delimiter, b"\n", b"\r", _MARK)
+
+
+@dataclass
+class _RowIndex:
+    """Checkpoint i is byte offset offsets[i], with rows[i] records ended before
+    it (counted from the start of the indexed range); in_quotes[i] tells
+    whether it falls inside a quoted field."""
+
+    offsets: list[int] = field(default_factory=list)
+    rows: list[int] = field(default_factory=list)
+    in_quotes: list[bool] = field(default_factory=list)
+    total: int = 0
+    # False if the file has quotes that quote parity does not account for
+    exact: bool = True
+
+    def merge(self, other: _RowIndex) -> None:
+        self.offsets += other.offsets
+        self.rows += [r + self.total for r in other.rows]
+        self.in_quotes += other.in_quotes
+        self.total += other.total
+        self.exact = self.exact and other.exact
+
+    def seek(self, f, row: int) -> tuple[int, int] | None:
+        """Return (offset, row) of the last indexed record start at or before ``row``."""
+        i = bisect_right(self.rows, row - 1) - 1
+        if i < 0:
+            return None
+        return _record_end(f, self.offsets[i], self.in_quotes[i]), self.rows[i] + 1
+
+
+def _index_range(
+    path: str, start: int, end: int, delimiter: str, limit: int | None = None
+) -> tuple[_RowIndex, int, int]:
+    index = _RowIndex()
+    delim = delimiter.encode()
+    in_quotes = False
+    rows = 0
+    quotes = 0
+    last = b""
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            block = f.read(min(_INDEX_BLOCK, end - pos))
+            if not block:
+                break
+            index.offsets.append(pos)
+            index.rows.append(rows)
+            index.in_quotes.append(in_quotes)
+            pos += len(block)
+            prev, last = last, block[-1:]
+            quotes += block.count(_QUOTE)
+
+            # The end of the previous block is kept as context for the stray
+            # quote check; a field left open is closed by an empty quoted
+            # section, so that the regex sees it whole.
+            if in_quotes:
+                j = block.find(_QUOTE)
+                if j < 0:
+                    continue
+                block = b'""' + block[j + 1 :]
+                in_quotes = False
+            elif prev == _QUOTE:
+                block = b'""' + block
+            elif prev != b"\n":
+                block = prev + block
+            # A quote left over opens a field that continues into the next block.
+            block = _QUOTED_RE.sub(_MARK, block)
+            if index.exact and _stray_quotes(block, delim):
+                index.exact = False
+            j = block.find(_QUOTE)
+            if j >= 0:
+                rows += block.count(b"\n", 0, j)
+                in_quotes = True
+            else:
+                rows += block.count(b"\n")
+    # csv.reader also returns a final record that has no terminator.
+    if pos > start and (last != b"\n" or in_quotes):
+        rows += 1
+    index.total = rows
+    return index, rows, quotes
+
+
+def _index_records(path: str, start: int, end: int, dialect: _Dialect) -> tuple[_RowIndex, int]:
+    """Index bytes [start, end) of path by parsing them with csv.reader.
+
+    Checkpoints are placed on the newline that ends a record, so seeking
+    needs no quote state.
+    """
+    index = _RowIndex()
+    pos = start
+    at_line_end = False
+
+    def lines() -> Iterator[str]:
+        nonlocal pos, at_line_end
+        with open(path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if pos >= end:
+                    return
+                parts = list(io.StringIO(line.decode(dialect.encoding, errors="replace"), newline=""))
+                for k, part in enumerate(parts, 1):
+                    at_line_end = k == len(parts)
+                    if at_line_end:
+                        pos += len(line)
+                    yield part
+
+    rows = 0
+    checkpoint = start + _INDEX_BLOCK
+    for _ in dialect.reader(lines()):
+        rows += 1
+        if pos >= checkpoint and at_line_end and pos < end:
+            index.offsets.append(pos - 1)
+            index.rows.append(rows - 1)
+            index.in_quotes.append(False)
+            checkpoint = pos + _INDEX_BLOCK
+    index.total = rows
+    return index, rows
+
+
+# Queries
+# -------
+#
+# csv_query compiles its arguments into a _QueryPlan of column indexes that
+# range workers evaluate row by row. Only referenced columns are decoded:
+# records without quotes are split just up to the last referenced column, and
+# only aggregated fields are parsed as numbers. Each group keeps a fixed-size
+# accumulator, so memory grows with the number of groups, not of rows.
+
+_QUERY_MAX_GROUPS = 10_000
+_AGGREGATES = ("count", "sum", "avg", "min", "max")
+_OPS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_QUERY_TOKEN_RE = re.compile(r"""\s*(?:"([^"]*)"|'([^']*)'|(<=|>=|!=|=|<|>|~)|([^\s<>=!~"']+))""")
+_AGG_RE = re.compile(r"(\w+)\s*(?:\(\s*(.*?)\s*\))?")
+_PREFIX_RE = re.compile(r"(.*?)\s*\[\s*:\s*(\d+)\s*\]")
+# Values worth handing to float(): a digit after an optional sign or dot, or inf.
+_NUMBER_START_RE = re.compile(r"\s*[+-]?(?:\.?\d|inf)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class _QueryPlan:
+    # OR of AND-ed (column, op, value, value as number or None) comparisons
+    where: tuple[tuple[tuple[int, str, str, float | None], ...], ...]
+    # (column, prefix length or None) per group key
+    group: tuple[tuple[int, int | None], ...]
+    # (function, column or None) per aggregate
+    aggs: tuple[tuple[str, int | None], ...]
+    # Fields decoded per record: one past the highest referenced column
+    width: int
+
+
+@dataclass
+class _QueryResult:
+    """Per group, two accumulator slots per aggregate: (values seen, running value)."""
+
+    aggs: tuple[tuple[str, int | None], ...]
+    groups: dict[tuple[str, ...], list] = field(default_factory=dict)
+    matched: int = 0
+
+    def new_group(self, key: tuple[str, ...]) -> list:
+        if len(self.groups) >= _QUERY_MAX_GROUPS:
+            raise ValueError(f"more than {_QUERY_MAX_GROUPS} groups")
+        acc = self.groups[key] = [0, None] * len(self.aggs)
+        return acc
+
+    def merge(self, other: _QueryResult) -> None:
+        self.matched += other.matched
+        for key, theirs in other.groups.items():
+            acc = self.groups.get(key)
+            if acc is None:
+                self.new_group(key)[:] = theirs
+                continue
+            for j, (fn, _) in enumerate(self.aggs):
+                n, v = theirs[2 * j], theirs[2 * j + 1]
+                if not n:
+                    continue
+                acc[2 * j] += n
+                if v is None:
+                    continue
+                mine = acc[2 * j + 1]
+                if mine is None:
+                    acc[2 * j + 1] = v
+                elif fn in ("sum", "avg"):
+                    acc[2 * j + 1] = mine + v
+                else:
+                    acc[2 * j + 1] = _extreme(fn, mine, v)
+
+    def values(self, acc: list) -> list[float | int | None]:
+        out = []
+        for j, (fn, idx) in enumerate(self.aggs):
+            n, v = acc[2 * j], acc[2 * j + 1]
+            if fn == "count":
+                out.append(n)
+            elif fn == "avg":
+                out.append(v / n if n else None)
+            else:
+                out.append(v)
+        return out
+
+
+def _extreme(fn: str, current: float | str | None, x: float | str) -> float | str:
+    """Running min/max: numbers compare numerically and win over strings."""
+    if current is None:
+        return x
+    x_text, current_text = isinstance(x, str), isinstance(current, str)
+    if x_text != current_text:
+        return current if x_text else x
+    return min(current, x) if fn == "min" else max(current, x)
+
+
+def _as_number(v: str) -> float | None:
+    try:
+        x = float(v)
+    except ValueError:
+        return None
+    return None if x != x else x
+
+
+def _query_column(header: list[str], name: str) -> int:
+    idx = _find_column(header, name)
+    if idx is None:
+        raise ValueError(f"unknown column: {name!r}. columns: {', '.join(header)}")
+    return idx
+
+
+def _parse_where(text: str, header: list[str]) -> tuple:
+    """Parse ``col op value [and|or ...]``; ``and`` binds tighter than ``or``.
+
+    Operators are = != < <= > >= and ~ (substring). Names and values with
+    spaces can be quoted.
+    """
+    tokens = []  # (is_operator, text)
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = _QUERY_TOKEN_RE.match(text, pos)
+        if m is None:
+            raise ValueError(f"cannot parse where at: {text[pos:]!r}")
+        dq, sq, op, word = m.groups()
+        tokens.append((op is not None, next(t for t in (dq, sq, op, word) if t is not None)))
+        pos = m.end()
+
+    clauses, clause = [], []
+    for i in range(0, len(tokens), 4):
+        part = tokens[i : i + 3]
+        if len(part) < 3 or [t[0] for t in part] != [False, True, False]:
+            raise ValueError(f"expected 'column op value' in where: {text!r}")
+        (_, name), (_, op), (_, value) = part
+        clause.append((_query_column(header, name), op, value, None if op == "~" else _as_number(value)))
+        if i + 3 < len(tokens):
+            joiner = tokens[i + 3][1].lower()
+            if tokens[i + 3][0] or joiner not in ("and", "or") or i + 4 >= len(tokens):
+                raise ValueError(f"expected 'and' or 'or' between comparisons in where: {text!r}")
+            if joiner == "or":
+                clauses.append(tuple(clause))
+                clause = []
+    if clause:
+        clauses.append(tuple(clause))
+    return tuple(clauses)
+
+
+def _parse_group_by(text: str, header: list[str]) -> tuple:
+    """Parse comma-separated columns; ``col[:n]`` groups by the first n characters."""
+    group = []
+    for part in filter(None, (t.strip() for t in text.split(","))):
+        m = _PREFIX_RE.fullmatch(part)
+        if m:
+            group.append((_query_column(header, m.group(1)), int(m.group(2))))
+        else:
+            group.append((_query_column(header, part), None))
+    return tuple(group)
+
+
+def _parse_aggregates(text: str, header: list[str]) -> tuple:
+    """Parse comma-separated ``count``, ``count(col)``, ``sum|avg|min|max(col)``."""
+    aggs = []
+    for part in filter(None, (t.strip() for t in text.split(","))):
+        m = _AGG_RE.fullmatch(part)
+        fn = m.group(1).lower() if m else ""
+        if fn not in _AGGREGATES:
+            raise ValueError(f"unknown aggregate: {part!r} (use {', '.join(_AGGREGATES)})")
+        arg = m.group(2)
+        if arg in (None, "", "*"):
+            if fn != "count":
+                raise ValueError(f"{fn} needs a column: {part!r}")
+            aggs.append((fn, None))
+        else:
+            aggs.append((fn, _query_column(header, arg)))
+    return tuple(aggs) or (("count", None),)
+
+
+def _agg_name(header: list[str], fn: str, idx: int | None) -> str:
+    return fn if idx is None else f"{fn}({header[idx]})"
+
+
+def _compile_where(where: tuple):
+    """Build a row predicate from a parsed where clause (None matches every row)."""
+
+    def compile_test(idx, op, value, number):
+        if op == "~":
+            return lambda row: value in row[idx]
+        cmp = _OPS[op]
+        if number is None:
+            return lambda row: cmp(row[idx].strip(), value)
+
+        def test(row):
+            try:
+                return cmp(float(row[idx]), number)
+            except ValueError:
+                return op == "!="
+
+        return test
+
+    if not where:
+        return None
+    clauses = [[compile_test(*c) for c in clause] for clause in where]
+    if len(clauses) == 1 and len(clauses[0]) == 1:
+        return clauses[0][0]
+    return lambda row: any(all(t(row) for t in clause) for clause in clauses)
+
+
+def _group_key(group: tuple):
+    if not group:
+        return None
+    if len(group) == 1 and group[0][1] is None:
+        i = group[0][0]
+        return lambda row: (row[i].strip(),)
+    return lambda row: tuple(row[i].strip()[:n] if n else row[i].strip() for i, n in group)
+
+
+def _accumulate(aggs: tuple, acc: list, rows: list[list[str]]) -> None:
+    """Fold one group's rows from a chunk into its accumulator."""
+    for j, (fn, idx) in enumerate(aggs):
+        if idx is None:
+            acc[2 * j] += len(rows)
+            continue
+        values = [r[idx] for r in rows]
+        if fn == "count":
+            acc[2 * j] += sum(1 for v in values if not _is_missing(v))
+            continue
+        try:
+            nums = list(map(float, values))
+        except ValueError:
+            nums = [x for x in map(_as_number, filter(_NUMBER_START_RE.match, values)) if x is not None]
+        total = sum(nums)
+        if total != total:
+            nums = [x for x in nums if x == x]
+            total = sum(nums)
+        if fn == "sum" or fn == "avg":
+            if nums:
+                acc[2 * j] += len(nums)
+                v = acc[2 * j + 1]
+                acc[2 * j + 1] = total if v is None else v + total
+            continue
+        pick = min if fn == "min" else max
+        if not nums:
+            nums = [t for t in (v.strip() for v in values) if not _is_missing(t)]
+        if nums:
+            acc[2 * j] += len(nums)
+            acc[2 * j + 1] = _extreme(fn, acc[2 * j + 1], pick(nums))
+
+
+def _run_query(plan: _QueryPlan, rows_iter: Iterator[list[str]]) -> tuple[_QueryResult, int]:
+    """Filter, group and aggregate rows a chunk at a time."""
+    result = _QueryResult(aggs=plan.aggs)
+    match = _compile_where(plan.where)
+    key_fn = _group_key(plan.group)
+    width = plan.width
+    pad = [""] * width
+    scanned = 0
+    with _no_gc():
+        while True:
+            rows = list(islice(rows_iter, _PROFILE_CHUNK_ROWS))
+            if not rows:
+                return result, scanned
+            scanned += len(rows)
+            rows = [r if len(r) >= width else r + pad for r in rows]
+            if match is not None:
+                rows = list(filter(match, rows))
+            result.matched += len(rows)
+            if key_fn is None:
+                parts = {(): rows} if rows else {}
+            else:
+                parts = {}
+                for row in rows:
+                    key = key_fn(row)
+                    part = parts.get(key)
+                    if part is None:
+                        parts[key] = [row]
+                    else:
+                        part.append(row)
+            for key, part in parts.items():
+                acc = result.groups.get(key) or result.new_group(key)
+                _accumulate(result.aggs, acc, part)
+
+
+class _Pushback:
+    """Line iterator that can hand one line back to its consumer."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self.head: str | None = None
+
+    def __iter__(self) -> _Pushback:
+        return self
+
+    def __next__(self) -> str:
+        line = self.head
+        if line is None:
+            return next(self._lines)
+        self.head = None
+        return line
+
+
+def _project_rows(lines: Iterator[str], dialect: _Dialect, width: int) -> Iterator[list[str]]:
+    """Yield records with at least their first ``width`` fields decoded.
+
+    Lines without quotes are split only up to field ``width``; quoted records
+    go through csv.reader, which pulls continuation lines from ``lines``.
+    """
+    source = _Pushback(lines)
+    reader = dialect.reader(source)
+    delimiter, quotechar = dialect.delimiter, dialect.quotechar
+    for line in source:
+        if quotechar in line:
+            source.head = line
+            row = next(reader, [])
+        else:
+            line = line.rstrip("\r\n")
+            row = line.split(delimiter, width) if line else []
+        if row:
+            yield row
+
+
+def _query_range(
+    path: str, start: int, end: int, dialect: _Dialect, plan: _QueryPlan, limit: int | None = None
+) -> tuple[_QueryResult, int, int]:
+    quotes = [0]
+    lines = _iter_range_lines(path, start, end, dialect.encoding, quotes)
+    return *_run_query(plan, islice(_project_rows(lines, dialect, plan.width), limit)), quotes[0]
+
+
+def _fmt_number(v: float | int | str | None) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, str):
+        return v.replace("\n", "\\n")
+    if isinstance(v, int) or (v.is_integer() and abs(v) < 1e15):
+        return str(int(v))
+    return f"{v:.15g}"
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop is not safe
+        _executor = ProcessPoolExecutor(
+            max_workers=_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def _map_ranges(fn, p: Path, ranges: list[tuple[int, int]], *args) -> list:
+    """Run fn(path, start, end, *args) for each range in the process pool."""
+    loop = asyncio.get_running_loop()
+    pool = _get_executor()
+    return await asyncio.gather(
+        *(loop.run_in_executor(pool, fn, str(p), start, end, *args) for start, end in ranges)
+    )
+
+
+# Reader
+# ------
+#
+# Tools read a file through a _Dialect sniffed from its first _SNIFF_BYTES:
+# the compression (by magic bytes), the encoding (a BOM, else UTF-8 if the sample decodes, else cp1252), the
+# quote character, the delimiter (the candidate giving the most rows of one
+# width) and whether the first row is a header. Dialects are cached per file
+# until its size or mtime changes, so retries and follow-up calls don't
+# re-sniff. Byte-range scans need "\n" and '"' to be single bytes, so UTF-16
+# files and files quoted with "'" are read in text mode instead. So are
+# compressed files, which are decompressed as a stream without temp files.
+
+_SNIFF_BYTES = 64 * 1024
+_SNIFF_ROWS = 50
+_DELIMITERS = (",", "\t", ";", "|")
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+_DIALECTS_MAX = 256
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+
+
+@dataclass(frozen=True)
+class _Dialect:
+    delimiter: str = ","
+    quotechar: str = '"'
+    encoding: str = "utf-8"
+    header: bool = True
+    # Length of the byte order mark before the first row
+    bom: int = 0
+    compression: str | None = None
+
+    @property
+    def byte_ranges(self) -> bool:
+        return self.compression is None and self.quotechar == '"' and not self.encoding.startswith("utf-16")
+
+    def reader(self, lines: Iterator[str]):
+        return csv.reader(lines, delimiter=self.delimiter, quotechar=self.quotechar)
+
+
+_dialects: dict[tuple[str, str], tuple[tuple[int, int], _Dialect]] = {}
+
+
+def _compression(p: Path) -> str | None:
+    with p.open("rb") as f:
+        head = f.read(6)
+    return next((name for magic, name in _MAGIC if head.startswith(magic)), None)
+
+
+def _open_zstd(p: Path):
+    if _zstd is not None:
+        return _zstd.open(p, "rb")
+    if zstandard is None:
+        raise RuntimeError(f"{p} is zstd-compressed; install the 'zstandard' package to read it")
+    return zstandard.ZstdDecompressor().stream_reader(p.open("rb"), read_across_frames=True, closefd=True)
+
+
+@contextmanager
+def _open_binary(p: Path, compression: str | None) -> Iterator[io.BufferedIOBase]:
+    """Open p for reading, decompressing it on the fly."""
+    if compression is None:
+        with p.open("rb") as f:
+            yield f
+        return
+    opener = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}.get(compression, _open_zstd)
+    with opener(p) as f:
+        yield io.BufferedReader(f, _READ_BLOCK)
+
+
+def _sniff_encoding(sample: bytes, truncated: bool) -> tuple[str, int]:
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A character cut in half by the end of the sample is still UTF-8.
+        if not (truncated and e.start >= len(sample) - 3):
+            return "cp1252", 0
+    return "utf-8", 0
+
+
+def _sniff_quotechar(text: str) -> str:
+    counts = {
+        q: len(re.findall(rf"(?:^|[,\t;|]){q}[^{q}\n]*{q}(?=[,\t;|]|\r?$)", text, re.MULTILINE))
+        for q in "\"'"
+    }
+    return "'" if counts["'"] > counts['"'] else '"'
+
+
+def _sniff_rows(text: str, delimiter: str, quotechar: str, truncated: bool) -> list[list[str]]:
+    reader = csv.reader(io.StringIO(text, newline=""), delimiter=delimiter, quotechar=quotechar)
+    rows = list(islice(reader, _SNIFF_ROWS + 1))
+    if len(rows) > _SNIFF_ROWS:
+        rows = rows[:_SNIFF_ROWS]
+    elif truncated:
+        rows = rows[:-1]
+    return [r for r in rows if r]
+
+
+def _sniff_delimiter(text: str, quotechar: str, truncated: bool) -> str:
+    best, best_score = ",", (0, 0)
+    for d in _DELIMITERS:
+        widths = Counter(len(r) for r in _sniff_rows(text, d, quotechar, truncated))
+        if not widths:
+            continue
+        width, freq = widths.most_common(1)[0]
+        if width > 1 and (freq, width) > best_score:
+            best, best_score = d, (freq, width)
+    return best
+
+
+def _sniff_header(rows: list[list[str]]) -> bool:
+    """The first row is data when it has numbers and text, typed like the rows below it.
+
+    A row of numbers alone (2019,2020,...) is ambiguous and kept as the header.
+    """
+    if len(rows) < 2:
+        return True
+    first, rest = rows[0], rows[1:]
+    numeric = [_as_number(v) is not None for v in first]
+    if not any(numeric) or all(n or _is_missing(v) for v, n in zip(first, numeric)):
+        return True
+    for i, (value, is_number) in enumerate(zip(first, numeric)):
+        if _is_missing(value):
+            continue
+        values = [r[i] for r in rest if i < len(r) and not _is_missing(r[i])]
+        if values and is_number != (sum(_as_number(v) is not None for v in values) >= 0.9 * len(values)):
+            return True
+    return False
+
+
+def _sniff(p: Path, delimiter: str = "") -> _Dialect:
+    compression = _compression(p)
+    with _open_binary(p, compression) as f:
+        sample = f.read(_SNIFF_BYTES)
+        truncated = bool(f.read(1))
+    encoding, bom = _sniff_encoding(sample, truncated)
+    text = sample[bom:].decode(encoding, errors="replace")
+    quotechar = _sniff_quotechar(text)
+    delimiter = delimiter or _sniff_delimiter(text, quotechar, truncated)
+    header = _sniff_header(_sniff_rows(text, delimiter, quotechar, truncated))
+    return _Dialect(delimiter, quotechar, encoding, header, bom, compression)
+
+
+def _dialect(p: Path, delimiter: str = "") -> _Dialect:
+    """Return p's dialect; a non-empty ``delimiter`` overrides the sniffed one."""
+    st = p.stat()
+    stamp = (st.st_size, st.st_mtime_ns)
+    key = (str(p.resolve()), delimiter)
+    cached = _dialects.get(key)
+    if cached is None or cached[0] != stamp:
+        cached = _dialects[key] = (stamp, _sniff(p, delimiter))
+        if len(_dialects) > _DIALECTS_MAX:
+            del _dialects[next(iter(_dialects))]
+    return cached[1]
+
+
+@contextmanager
+def _open_text(p: Path, dialect: _Dialect) -> Iterator[io.TextIOWrapper]:
+    with _open_binary(p, dialect.compression) as raw:
+        raw.read(dialect.bom)
+        f = io.TextIOWrapper(raw, encoding=dialect.encoding, errors="replace", newline="")
+        try:
+            yield f
+        finally:
+            f.detach()
+
+
+def _read_header(p: Path, dialect: _Dialect) -> tuple[list[str], int | None] | None:
+    """Return the header row and the byte offset where the data starts.
+
+    Files without a header get columns named col_0, col_1, ... The offset is
+    None when the data cannot be scanned as byte ranges: the dialect does not
+    allow it, the file uses bare "\r" line endings, or the first row is
+    implausibly long. Returns None for an empty file.
+    """
+    if not dialect.byte_ranges:
+        with _open_text(p, dialect) as f:
+            first = next(dialect.reader(f), None)
+        if first is None:
+            return None
+        return (first if dialect.header else [f"col_{i}" for i in range(len(first))]), None
+
+    with p.open("rb") as f:
+        f.seek(dialect.bom)
+        head = f.read(_READ_BLOCK)
+        more = bool(f.read(1))
+    first_end = _record_end(io.BytesIO(head), 0, False)
+    text = head[:first_end].decode(dialect.encoding, errors="replace")
+    rows = list(dialect.reader(io.StringIO(text, newline="")))
+    if not rows:
+        return None
+    header = rows[0] if dialect.header else [f"col_{i}" for i in range(len(rows[0]))]
+    if len(rows) > 1 or (first_end == len(head) and more and not head.endswith(b"\n")):
+        return header, None
+    return header, dialect.bom + (first_end if dialect.header else 0)
+
+
+def _resolve_columns(p: Path, dialect: _Dialect, resolve):
+    """Return (dialect, header, data_start, resolve(header)), or None for an empty file.
+
+    resolve raises ValueError for unknown columns. When the sniffer took the
+    first row for data but the columns are found only in that row, it is
+    taken as the header after all.
+    """
+    found = _read_header(p, dialect)
+    if found is None:
+        return None
+    try:
+        return dialect, *found, resolve(found[0])
+    except ValueError as e:
+        if dialect.header:
+            raise
+        error = e
+    named = replace(dialect, header=True)
+    header, data_start = _read_header(p, named)
+    try:
+        return named, header, data_start, resolve(header)
+    except ValueError:
+        raise error from None
+
+
+def _text_rows(p: Path, dialect: _Dialect) -> Iterator[list[str]]:
+    """Data rows read in text mode (for files _read_header can't offset)."""
+    with _open_text(p, dialect) as f:
+        reader = dialect.reader(f)
+        if dialect.header:
+            next(reader, None)
+        yield from reader
+
+
+async def _split_records(
+    p: Path, start: int, end: int, parts: int
+) -> tuple[list[tuple[int, int]], int]:
+    """Cut bytes [start, end) of p into up to ``parts`` ranges of whole records.
+
+    Also returns the number of quote characters in [start, end).
+    """
+    step = max(1, (end - start) // parts)
+    raw = [start + i * step for i in range(parts)] + [end]
+    counts = await _map_ranges(_count_quotes, p, list(zip(raw, raw[1:])))
+    cuts = [start]
+    quotes = 0
+    with p.open("rb") as f:
+        for pos, n in zip(raw[1:-1], counts):
+            quotes += n
+            cut = min(_record_end(f, pos, bool(quotes & 1)), end)
+            if cut > cuts[-1]:
+                cuts.append(cut)
+    if cuts[-1] < end:
+        cuts.append(end)
+    return list(zip(cuts, cuts[1:])), sum(counts)
+
+
+def _merge_result(a, b):
+    """Merge two partial scan results of the same kind."""
+    if isinstance(a, list):
+        for x, y in zip(a, b):
+            x.merge(y)
+    elif isinstance(a, (_ValueSketch, _RowIndex, _QueryResult)):
+        a.merge(b)
+    else:
+        a.update(b)
+    return a
+
+
+async def _scan(
+    p: Path, start: int, end: int, limit: int | None, range_fn, *args
+) -> tuple[object, int, int]:
+    """Scan the records in bytes [start, end) of p with range_fn.
+
+    Returns the result, the number of rows and, when the range was read to the
+    end, the number of quote characters in it (0 otherwise).
+    """
+    if limit is None and _WORKERS > 1 and end - start >= _PARALLEL_MIN_BYTES:
+        ranges, quotes = await _split_records(p, start, end, _WORKERS)
+        parts = await _map_ranges(range_fn, p, ranges, *args)
+        result, rows, _ = parts[0]
+        for part, n, _ in parts[1:]:
+            result = _merge_result(result, part)
+            rows += n
+        return result, rows, quotes
+
+    result, rows, quotes = range_fn(str(p), start, end, *args, limit)
+    complete = limit is None or rows < limit
+    return result, rows, quotes if complete else 0
+
+
+# Result cache
+# ------------
+#
+# Scan results are stored as JSON in _CACHE_DIR, one file per file/tool/
+# arguments. An entry is valid while the file's size and mtime are unchanged
+# and the hashes of its first and last _IDENTITY_BYTES still match. If the
+# file has grown and the old content is untouched (same head hash, and the old
+# tail hash found at the old end), it was appended to: a scan that had stopped
+# at max_rows is still valid, and a scan that had reached the end resumes from
+# the old end of file and merges the new rows into the stored result.
+#
+# Entries are touched when used. Every _CACHE_PRUNE_INTERVAL seconds a store
+# deletes entries unused for _CACHE_MAX_AGE seconds, and then the least
+# recently used ones until the directory is under _CACHE_MAX_BYTES. Files
+# sharing a name stem (an entry, its Parquet copy) go together.
+
+_CACHE_VERSION = 3
+_IDENTITY_BYTES = 64 * 1024
+# Exact top-values counters with more distinct values than this are not cached.
+_CACHE_MAX_VALUES = 100_000
+_cache_env = os.getenv("CSV_INSPECTOR_CACHE_DIR")
+_CACHE_DIR: Path | None = (
+    None if _cache_env == "" else Path(_cache_env or "~/.cache/csv-inspector").expanduser()
+)
+_CACHE_MAX_BYTES = int(os.getenv("CSV_INSPECTOR_CACHE_MAX_MB", "2048")) * 1024 * 1024
+_CACHE_MAX_AGE = 30 * 24 * 3600
+_CACHE_PRUNE_INTERVAL = 600
+_cache_pruned = 0.0
+
+
+def _file_identity(p: Path, size: int) -> tuple[str, str]:
+    """Hash the first and last _IDENTITY_BYTES of the first ``size`` bytes of p."""
+    digests = []
+    with p.open("rb") as f:
+        for start in (0, max(0, size - _IDENTITY_BYTES)):
+            f.seek(start)
+            data = f.read(min(_IDENTITY_BYTES, size - start))
+            digests.append(blake2b(data, digest_size=16).hexdigest())
+    return digests[0], digests[1]
+
+
+def _cache_file(p: Path, key: tuple) -> Path:
+    name = blake2b(json.dumps([_CACHE_VERSION, str(p.resolve()), *key]).encode(), digest_size=16)
+    return _CACHE_DIR / f"{name.hexdigest()}.json"
+
+
+def _dump_result(result) -> dict | None:
+    if isinstance(result, list):
+        return {"cols": [asdict(c) for c in result]}
+    if isinstance(result, _RowIndex):
+        return {"index": asdict(result)}
+    if isinstance(result, _ValueSketch):
+        return {
+            "sketch": {
+                "capacity": result.capacity,
+                "counts": dict(result.counts),
+                "error": result.error,
+                "total": result.total,
+                "registers": result.registers.hex(),
+            }
+        }
+    if len(result) > _CACHE_MAX_VALUES:
+        return None
+    return {"counts": dict(result)}
+
+
+def _load_result(data: dict):
+    if "cols" in data:
+        return [_ColStats(**{**c, "quantiles": _Quantiles(**c["quantiles"])}) for c in data["cols"]]
+    if "index" in data:
+        return _RowIndex(**data["index"])
+    if "sketch" in data:
+        sk = data["sketch"]
+        return _ValueSketch(
+            capacity=sk["capacity"],
+            counts=Counter(sk["counts"]),
+            error=sk["error"],
+            total=sk["total"],
+            registers=bytearray.fromhex(sk["registers"]),
+        )
+    return Counter(data["counts"])
+
+
+def _cache_load(p: Path, key: tuple, st: os.stat_result) -> dict | None:
+    """Return the cache entry for p if it is still valid for p's content or a prefix of it."""
+    if _CACHE_DIR is None:
+        return None
+    try:
+        entry = json.loads(_cache_file(p, key).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    old = entry["size"]
+    if st.st_size < old or (st.st_size == old and st.st_mtime_ns != entry["mtime_ns"]):
+        return None
+    if _file_identity(p, old) != (entry["head"], entry["tail"]):
+        return None
+    _cache_touch(_cache_file(p, key))
+    return entry
+
+
+def _cache_touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _cache_prune() -> None:
+    """Delete stale and least recently used entries (see above)."""
+    global _cache_pruned
+    now = time.time()
+    if _CACHE_DIR is None or now - _cache_pruned < _CACHE_PRUNE_INTERVAL:
+        return
+    _cache_pruned = now
+    # name stem -> [bytes, last used, paths]
+    groups: dict[str, list] = {}
+    try:
+        with os.scandir(_CACHE_DIR) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                group = groups.setdefault(entry.name.split(".", 1)[0], [0, 0.0, []])
+                group[0] += st.st_size
+                group[1] = max(group[1], st.st_mtime)
+                group[2].append(entry.path)
+    except OSError:
+        return
+    total = sum(g[0] for g in groups.values())
+    for size, used, paths in sorted(groups.values(), key=lambda g: g[1]):
+        if total <= _CACHE_MAX_BYTES and now - used <= _CACHE_MAX_AGE:
+            break
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        total -= size
+
+
+def _cache_store(p: Path, key: tuple, st: os.stat_result, entry: dict) -> None:
+    if _CACHE_DIR is None or entry["result"] is None:
+        return
+    size = st.st_size
+    entry["size"] = size
+    entry["mtime_ns"] = st.st_mtime_ns
+    entry["head"], entry["tail"] = _file_identity(p, size)
+    with p.open("rb") as f:
+        f.seek(max(0, size - 1))
+        ends_with_newline = f.read(1) == b"\n"
+    # Appended rows can only be scanned on their own if the old content ended
+    # on a record boundary.
+    entry["resumable"] = entry["complete"] and not entry["quotes_odd"] and ends_with_newline
+    path = _cache_file(p, key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    _cache_prune()
+
+
+async def _cached_scan(
+    p: Path, key: tuple, data_start: int, limit: int | None, range_fn, *args, columnar=None
+) -> tuple[object, int, str]:
+    """Scan the data section of p, reusing or extending a cached result.
+
+    ``columnar``, if given, computes (result, rows, quotes_odd) from the
+    columnar cache and replaces a fresh scan. Returns the result, the number of rows and a
+    note on cache use ("" when the file was scanned from scratch).
+    """
+    st = p.stat()
+    entry = _cache_load(p, key, st)
+    note = ""
+    if entry is not None and (st.st_size == entry["size"] or not entry["complete"]):
+        result, rows, quotes_odd = _load_result(entry["result"]), entry["rows"], entry["quotes_odd"]
+        note = "hit"
+        if st.st_size == entry["size"]:
+            return result, rows, note
+    elif entry is not None and entry["resumable"]:
+        result, rows, quotes_odd = _load_result(entry["result"]), entry["rows"], entry["quotes_odd"]
+        remaining = None if limit is None else limit - rows
+        more, new_rows, quotes = await _scan(p, entry["size"], st.st_size, remaining, range_fn, *args)
+        result = _merge_result(result, more)
+        rows += new_rows
+        quotes_odd ^= bool(quotes & 1)
+        note = f"extended with {new_rows} appended rows"
+    elif columnar is not None:
+        result, rows, quotes_odd = columnar()
+        quotes_odd = quotes_odd and (limit is None or rows < limit)
+        note = "columnar"
+    else:
+        result, rows, quotes = await _scan(p, data_start, st.st_size, limit, range_fn, *args)
+        quotes_odd = bool(quotes & 1)
+
+    complete = limit is None or rows < limit
+    _cache_store(
+        p,
+        key,
+        st,
+        {"result": _dump_result(result), "rows": rows, "complete": complete, "quotes_odd": quotes_odd},
+    )
+    return result, rows, note
+
+
+# Columnar cache
+# --------------
+#
+# With CSV_INSPECTOR_COLUMNAR=1 and pyarrow installed, a whole-file
+# csv_profile also converts the file to Parquet in _CACHE_DIR. Later
+# csv_profile, csv_top_values and csv_query calls that miss the result cache
+# read just the columns they need from it instead of parsing the CSV. Columns
+# keep their original text, except that a column profiled as int or float is
+# stored typed when every value converts to the type and back to the same
+# text; reads are therefore lossless and give the same results as a CSV scan.
+# The Parquet file is tied to the file's size, mtime and head/tail hashes like
+# the result cache, and is deleted once they no longer match. Files that
+# pyarrow reads differently from csv.reader (blank lines, ragged rows) are
+# marked unsupported instead.
+
+_COLUMNAR = os.getenv("CSV_INSPECTOR_COLUMNAR", "") not in ("", "0")
+_COLUMNAR_BATCH_ROWS = 1024 * 1024
+
+
+def _columnar_enabled() -> bool:
+    return _COLUMNAR and pa is not None and _CACHE_DIR is not None
+
+
+def _columnar_meta(p: Path, dialect: _Dialect) -> tuple[Path, dict] | None:
+    """Return the Parquet path and metadata for p, if they match p's current content."""
+    if not _columnar_enabled():
+        return None
+    meta_path = _cache_file(p, ("columnar", astuple(dialect)))
+    parquet = meta_path.with_suffix(".parquet")
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    st = p.stat()
+    if (st.st_size, st.st_mtime_ns) == (meta["size"], meta["mtime_ns"]) and _file_identity(
+        p, st.st_size
+    ) == (meta["head"], meta["tail"]):
+        _cache_touch(meta_path)
+        return parquet, meta
+    for stale in (parquet, meta_path):
+        stale.unlink(missing_ok=True)
+    return None
+
+
+def _columnar_load(p: Path, dialect: _Dialect) -> Path | None:
+    found = _columnar_meta(p, dialect)
+    if found is None or found[1]["unsupported"]:
+        return None
+    return found[0] if found[0].exists() else None
+
+
+class _QuoteCounter(io.RawIOBase):
+    """Counts the quote characters read through a binary stream."""
+
+    def __init__(self, raw: io.BufferedIOBase) -> None:
+        self.raw = raw
+        self.quotes = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self.raw.readinto(b)
+        self.quotes += memoryview(b)[:n].tobytes().count(_QUOTE)
+        return n
+
+
+def _columnar_quotes_odd(parquet: Path) -> bool:
+    meta = json.loads(parquet.with_suffix(".json").read_text(encoding="utf-8"))
+    return meta["quotes_odd"]
+
+
+def _lossless(column, typ) -> bool:
+    """True if the strings in ``column`` ("" as null) survive a round trip through typ."""
+    nulled = pc.if_else(pc.equal(column, ""), pa.scalar(None, pa.string()), column)
+    try:
+        typed = pc.cast(nulled, typ)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return False
+    same = pc.fill_null(pc.equal(pc.cast(typed, pa.string()), nulled), True)
+    return pc.all(same).as_py() is not False
+
+
+# Parquet files being written, by metadata path
+_columnar_builds: dict[Path, Future] = {}
+
+
+def _start_columnar_build(
+    p: Path, dialect: _Dialect, cols: list[_ColStats], rows: int, data_start: int | None
+) -> None:
+    """Convert p to Parquet on the process pool, unless that is done or under way.
+
+    The tool returns without waiting; calls made before the build finishes
+    scan the CSV as usual.
+    """
+    if not _columnar_enabled() or _columnar_meta(p, dialect) is not None:
+        return
+    meta_path = _cache_file(p, ("columnar", astuple(dialect)))
+    if meta_path in _columnar_builds:
+        return
+    future = _get_executor().submit(_build_columnar, p, dialect, cols, rows, data_start, meta_path)
+    _columnar_builds[meta_path] = future
+    future.add_done_callback(lambda _: _columnar_builds.pop(meta_path, None))
+
+
+def _build_columnar(
+    p: Path, dialect: _Dialect, cols: list[_ColStats], rows: int, data_start: int | None, meta_path: Path
+) -> None:
+    """Write p to Parquet, typing the columns that cols profiled as purely numeric.
+
+    The quote parity of the data section is counted during the conversion and
+    recorded with it, so result cache entries computed from the Parquet file
+    need no pass over the CSV.
+    """
+    parquet = meta_path.with_suffix(".parquet")
+    tmp = parquet.with_suffix(f".{os.getpid()}.tmp")
+    st = p.stat()
+    names = [f"c{i}" for i in range(len(cols))]
+    candidates = {}
+    for i, c in enumerate(cols):
+        if c.seen > c.missing and c.ints + c.missing == c.seen:
+            candidates[i] = pa.int64()
+        elif c.seen > c.missing and c.ints + c.floats + c.missing == c.seen:
+            candidates[i] = pa.float64()
+
+    written = 0
+    supported = True
+    try:
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        with _open_binary(p, dialect.compression) as raw:
+            raw.read(dialect.bom)
+            counted = _QuoteCounter(raw)
+            reader = pa_csv.open_csv(
+                counted,
+                read_options=pa_csv.ReadOptions(
+                    column_names=names, skip_rows=int(dialect.header), encoding=dialect.encoding
+                ),
+                parse_options=pa_csv.ParseOptions(
+                    delimiter=dialect.delimiter, quote_char=dialect.quotechar, newlines_in_values=True
+                ),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={n: pa.string() for n in names},
+                    strings_can_be_null=False,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+            with pq.ParquetWriter(tmp, reader.schema, compression="zstd") as writer:
+                for batch in reader:
+                    for i in [i for i in candidates if not _lossless(batch.column(i), candidates[i])]:
+                        del candidates[i]
+                    writer.write_batch(batch)
+                    written += batch.num_rows
+        supported = written == rows
+        if supported and candidates:
+            # Rewrite with the numeric columns typed.
+            source = pq.ParquetFile(tmp)
+            schema = pa.schema([(n, candidates.get(i, pa.string())) for i, n in enumerate(names)])
+            typed = tmp.with_suffix(".typed.tmp")
+            with pq.ParquetWriter(typed, schema, compression="zstd") as writer:
+                for batch in source.iter_batches(batch_size=_COLUMNAR_BATCH_ROWS):
+                    columns = [
+                        batch.column(i) if i not in candidates else pc.cast(
+                            pc.if_else(pc.equal(batch.column(i), ""), pa.scalar(None, pa.string()), batch.column(i)),
+                            candidates[i],
+                        )
+                        for i in range(len(names))
+                    ]
+                    writer.write_batch(pa.record_batch(columns, schema=schema))
+            os.replace(typed, tmp)
+    except pa.ArrowInvalid:
+        supported = False
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        return
+    if supported:
+        os.replace(tmp, parquet)
+    else:
+        tmp.unlink(missing_ok=True)
+
+    head, tail = _file_identity(p, st.st_size)
+    meta = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "head": head,
+        "tail": tail,
+        "rows": rows,
+        "unsupported": not supported,
+        "types": {names[i]: str(t) for i, t in candidates.items()} if supported else {},
+        "quotes_odd": supported
+        and data_start is not None
+        and bool((counted.quotes - _count_quotes(str(p), dialect.bom, data_start)) & 1),
+    }
+    try:
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _columnar_batches(parquet: Path, indices: list[int], batch_rows: int) -> Iterator[tuple[int, dict[int, list[str]]]]:
+    """Yield (rows, {column index: values as the original strings}) per batch."""
+    source = pq.ParquetFile(parquet)
+    names = [f"c{i}" for i in indices]
+    for batch in source.iter_batches(batch_size=batch_rows, columns=names):
+        columns = {}
+        for i, column in zip(indices, batch.columns):
+            if column.type != pa.string():
+                column = pc.fill_null(pc.cast(column, pa.string()), "")
+            columns[i] = column.to_pylist()
+        yield batch.num_rows, columns
+
+
+def _columnar_rows(
+    parquet: Path, indices: list[int], width: int, limit: int | None = None
+) -> Iterator[tuple[str, ...]]:
+    """Rows of ``width`` fields; only the fields in ``indices`` are read, the rest are ""."""
+    batch_rows = min(limit or _COLUMNAR_BATCH_ROWS, _COLUMNAR_BATCH_ROWS)
+    for n, columns in _columnar_batches(parquet, indices or [0], batch_rows):
+        if not width:
+            yield from repeat((), n)
+            continue
+        blank = repeat("", n)
+        yield from zip(*(columns.get(i, blank) for i in range(width)))
+
+
+def _columnar_profile(parquet: Path, names: list[str], limit: int | None) -> tuple[list[_ColStats], int]:
+    cols = [_ColStats(name=n) for n in names]
+    rows = _columnar_rows(parquet, list(range(len(names))), len(names), limit)
+    return cols, _profile_rows(cols, islice(rows, limit))
+
+
+def _columnar_values(
+    parquet: Path, idx: int, approximate: bool, limit: int | None
+) -> tuple[Counter[str] | _ValueSketch, int]:
+    """Like _values_range, counting each batch's distinct values with pyarrow."""
+    result = _ValueSketch() if approximate else Counter()
+    scanned = 0
+    source = pq.ParquetFile(parquet)
+    # Sketch batches match _sketch_values' chunks, so the summary is the same.
+    batch_rows = _SKETCH_CHUNK_ROWS if approximate else _COLUMNAR_BATCH_ROWS
+    for batch in source.iter_batches(batch_size=batch_rows, columns=[f"c{idx}"]):
+        column = batch.column(0)
+        if limit is not None:
+            column = column.slice(0, limit - scanned)
+        if not len(column):
+            break
+        scanned += len(column)
+        if column.type != pa.string():
+            column = pc.fill_null(pc.cast(column, pa.string()), "")
+        counts = Counter()
+        for item in pc.value_counts(pc.utf8_trim_whitespace(column)).to_pylist():
+            if not _is_missing(item["values"]):
+                counts[item["values"]] += item["counts"]
+        if approximate:
+            result.add_counts(counts)
+        else:
+            result.update(counts)
+    return result, scanned
+
+
+@contextmanager
+def _no_gc():
+    # Scans allocate millions of short-lived str lists/tuples; none of them
+    # form cycles, so pausing the cyclic GC roughly halves the parsing cost.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 @mcp.tool()
-async def csv_head(file_path: str, n: int = 5, delimiter: str = ",") -> str:
-    """Return the first N rows of a CSV file (including header if present)."""
+async def csv_head(file_path: str, n: int = 5, delimiter: str = "") -> str:
+    """Return the first N rows of a CSV file (including header if present).
+
+    delimiter is detected when empty, as in every tool.
+    """
     n = max(0, min(int(n), 100))
     p = _csv_path(file_path)
+    dialect = _dialect(p, delimiter)
 
     rows: list[list[str]] = []
-    with p.open("r", encoding="utf-8", errors="replace", newline="") as f:
-        reader = csv.reader(f, delimiter=delimiter)
+    with _open_text(p, dialect) as f:
+        reader = dialect.reader(f)
         for i, row in enumerate(reader):
             if i >= n:
                 break
@@ -90,50 +1862,124 @@ async def csv_head(file_path: str, n: int = 5, delimiter: str = ",") -> str:
     return "\n".join(out)
 
 
+# The row indexes used last, by file, kept in memory until the file's size or
+# mtime changes. They spare rebuilding an index per call when the disk cache
+# is disabled, and reading it back when it is not.
+_row_indexes: dict[tuple, tuple[tuple[int, int], _RowIndex, int]] = {}
+_ROW_INDEXES_MAX = 16
+
+
+async def _row_index(p: Path, dialect: _Dialect, data_start: int) -> tuple[_RowIndex, int]:
+    """Return the row index of p's data section and its number of rows."""
+    key = ("row_index", data_start, dialect.delimiter)
+    st = p.stat()
+    stamp = (st.st_size, st.st_mtime_ns)
+    mem_key = (str(p.resolve()), *key)
+    cached = _row_indexes.get(mem_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+
+    index, total, _ = await _cached_scan(p, key, data_start, None, _index_range, dialect.delimiter)
+    if not index.exact:
+        index, total = _index_records(str(p), data_start, st.st_size, dialect)
+        # quotes_odd: appended rows can't be indexed by quote parity either
+        entry = {"result": _dump_result(index), "rows": total, "complete": True, "quotes_odd": True}
+        _cache_store(p, key, st, entry)
+    _row_indexes.pop(mem_key, None)
+    if len(_row_indexes) >= _ROW_INDEXES_MAX:
+        del _row_indexes[next(iter(_row_indexes))]
+    _row_indexes[mem_key] = (stamp, index, total)
+    return index, total
+
+
 @mcp.tool()
-async def csv_profile(file_path: str, delimiter: str = ",", max_rows: int = 5000) -> str:
-    """Lightweight profiling: column names, missing counts, and rough type inference."""
-    max_rows = max(1, min(int(max_rows), 200_000))
+async def csv_rows(file_path: str, start: int, count: int = 20, delimiter: str = "") -> str:
+    """Return ``count`` data rows starting at data row ``start`` (0-based, header excluded).
+
+    Far rows are reached through a sparse byte-offset index that is built on
+    first use, kept in memory and cached like scan results.
+    """
+    start = max(0, int(start))
+    count = max(1, min(int(count), 200))
     p = _csv_path(file_path)
 
-    with p.open("r", encoding="utf-8", errors="replace", newline="") as f:
-        reader = csv.reader(f, delimiter=delimiter)
-        try:
-            header = next(reader)
-        except StopIteration:
-            return "empty file"
+    dialect = _dialect(p, delimiter)
+    found = _read_header(p, dialect)
+    if found is None:
+        return "empty file"
+    header, data_start = found
 
-        cols = [_ColStats(name=h.strip() or f"col_{i}") for i, h in enumerate(header)]
-        n_rows = 0
+    if data_start is None:
+        rows_iter = islice(_text_rows(p, dialect), start, None)
+        first = start
+    else:
+        pos, first = data_start, 0
+        if start >= _INDEX_MIN_ROW:
+            index, total = await _row_index(p, dialect, data_start)
+            if start >= total:
+                return f"(no rows: {p} has {total} data rows)"
+            with p.open("rb") as f:
+                pos, first = index.seek(f, start) or (data_start, 0)
+        lines_iter = _iter_range_lines(str(p), pos, p.stat().st_size, dialect.encoding)
+        rows_iter = islice(dialect.reader(lines_iter), start - first, None)
 
-        for row in reader:
-            n_rows += 1
-            if n_rows > max_rows:
-                break
+    rows = list(islice(rows_iter, count))
+    if not rows:
+        return f"(no rows at {start})"
+
+    out = ["row\t" + "\t".join(h.replace("\n", "\\n") for h in header)]
+    for i, r in enumerate(rows, start):
+        out.append(f"{i}\t" + "\t".join(c.replace("\n", "\\n") for c in r))
+    return "\n".join(out)
 
-            if len(row) < len(cols):
-                row = row + [""] * (len(cols) - len(row))
-            elif len(row) > len(cols):
-                row = row[: len(cols)]
-
-            for c, v in zip(cols, row):
-                c.seen += 1
-                k = _classify_value(v)
-                if k == "missing":
-                    c.missing += 1
-                elif k == "int":
-                    c.ints += 1
-                elif k == "float":
-                    c.floats += 1
-                elif k == "bool":
-                    c.bools += 1
-                else:
-                    c.strings += 1
+
+@mcp.tool()
+async def csv_profile(file_path: str, delimiter: str = "", max_rows: int = 5000) -> str:
+    """Lightweight profiling: column names, missing counts, and rough type inference.
+
+    max_rows <= 0 profiles the whole file. Results are cached (see _cached_scan).
+    """
+    max_rows = int(max_rows)
+    limit = max_rows if max_rows > 0 else None
+    p = _csv_path(file_path)
+
+    dialect = _dialect(p, delimiter)
+    found = _read_header(p, dialect)
+    if found is None:
+        return "empty file"
+    header, data_start = found
+    names = [h.strip() or f"col_{i}" for i, h in enumerate(header)]
+
+    parquet = _columnar_load(p, dialect)
+    columnar = (lambda: (*_columnar_profile(parquet, names, limit), _columnar_quotes_odd(parquet))) if parquet else None
+    if data_start is None:
+        if columnar:
+            (cols, n_rows, _), note = columnar(), "columnar"
+        else:
+            cols = [_ColStats(name=n) for n in names]
+            n_rows = _profile_rows(cols, islice(_text_rows(p, dialect), limit))
+            note = ""
+    else:
+        key = ("profile", astuple(dialect), limit)
+        cols, n_rows, note = await _cached_scan(
+            p, key, data_start, limit, _profile_range, dialect, names, columnar=columnar
+        )
+    if limit is None and parquet is None:
+        _start_columnar_build(p, dialect, cols, n_rows, data_start)
 
     lines = []
     lines.append(f"file: {p}")
-    lines.append(f"delimiter: {delimiter!r}")
+    lines.append(f"delimiter: {dialect.delimiter!r}")
+    lines.append(f"encoding: {dialect.encoding}")
+    if dialect.compression:
+        lines.append(f"compression: {dialect.compression}")
+    if dialect.quotechar != '"':
+        lines.append(f"quotechar: {dialect.quotechar!r}")
+    if not dialect.header:
+        lines.append("header: none detected (columns are named col_0, col_1, ...)")
     lines.append(f"rows_scanned: {n_rows}")
+    if note:
+        lines.append(f"cache: {note}")
     lines.append(f"columns: {len(cols)}")
     lines.append("")
     lines.append("name\ttype\tmissing\tmissing_%")
@@ -142,6 +1988,21 @@ async def csv_profile(file_path: str, delimiter: str = ",", max_rows: int = 5000
         miss_pct = (100.0 * c.missing / float(c.seen)) if c.seen else 0.0
         lines.append(f"{c.name}\t{c.infer_type()}\t{c.missing}\t{miss_pct:.1f}")
 
+    numeric = [c for c in cols if c.numbers and c.infer_type() in ("int", "float")]
+    if numeric:
+        lines.append("")
+        lines.append("numeric\tmin\tp25\tmedian\tp75\tmax\tmean\tstd")
+        for c in numeric:
+            stats = (c.low, *(c.quantiles.quantile(q) for q in _QUANTILES), c.high, c.mean, c.std())
+            lines.append(c.name + "".join(f"\t{v:.6g}" for v in stats))
+
+    text = [c for c in cols if c.lengths and c.infer_type() == "string"]
+    if text:
+        lines.append("")
+        lines.append("text\tmin_len\tmean_len\tmax_len")
+        for c in text:
+            lines.append(f"{c.name}\t{c.shortest}\t{c.length_total / c.lengths:.1f}\t{c.longest}")
+
     return "\n".join(lines)
 
 
@@ -149,52 +2010,72 @@ async def csv_profile(file_path: str, delimiter: str = ",", max_rows: int = 5000
 async def csv_top_values(
     file_path: str,
     column: str,
-    delimiter: str = ",",
+    delimiter: str = "",
     max_rows: int = 20000,
     top_k: int = 10,
+    approximate: bool = False,
 ) -> str:
-    """Return the most common (non-missing) values for a given column."""
-    max_rows = max(1, min(int(max_rows), 500_000))
+    """Return the most common (non-missing) values for a given column.
+
+    max_rows <= 0 scans the whole file. approximate=True keeps memory bounded
+    on high-cardinality columns (see _ValueSketch) and lifts the row cap.
+    """
+    max_rows = int(max_rows)
+    if max_rows <= 0:
+        limit = None
+    else:
+        limit = max_rows if approximate else min(max_rows, 500_000)
     top_k = max(1, min(int(top_k), 50))
     p = _csv_path(file_path)
 
-    with p.open("r", encoding="utf-8", errors="replace", newline="") as f:
-        reader = csv.reader(f, delimiter=delimiter)
-        try:
-            header = next(reader)
-        except StopIteration:
-            return "empty file"
-
-        idx = None
-        for i, h in enumerate(header):
-            if h == column:
-                idx = i
-                break
-        if idx is None:
-            for i, h in enumerate(header):
-                if h.strip().lower() == column.strip().lower():
-                    idx = i
-                    break
-        if idx is None:
-            return f"unknown column: {column!r}. columns: {', '.join(header)}"
+    dialect = _dialect(p, delimiter)
+    try:
+        found = _resolve_columns(p, dialect, lambda header: _query_column(header, column))
+    except ValueError as e:
+        return str(e)
+    if found is None:
+        return "empty file"
+    dialect, header, data_start, idx = found
 
-        counts: Counter[str] = Counter()
-        scanned = 0
-        for row in reader:
-            scanned += 1
-            if scanned > max_rows:
-                break
-            v = row[idx] if idx < len(row) else ""
-            if _is_missing(v):
-                continue
-            counts[v.strip()] += 1
+    parquet = _columnar_load(p, dialect)
+    columnar = (
+        (lambda: (*_columnar_values(parquet, idx, approximate, limit), _columnar_quotes_odd(parquet)))
+        if parquet
+        else None
+    )
+    if data_start is None:
+        if columnar:
+            (result, scanned, _), note = columnar(), "columnar"
+        else:
+            count_fn = _sketch_values if approximate else _count_values
+            result, scanned = count_fn(islice(_text_rows(p, dialect), limit), idx)
+            note = ""
+    else:
+        key = ("top_values", astuple(dialect), idx, approximate, limit)
+        result, scanned, note = await _cached_scan(
+            p, key, data_start, limit, _values_range, dialect, idx, approximate, columnar=columnar
+        )
 
+    counts = result.counts if approximate else result
+    if approximate and not counts and result.total:
+        return (
+            f"(no frequent values in column {column!r}: every value occurs at most "
+            f"{result.error} times; ~{result.distinct()} distinct values; rows_scanned={scanned})"
+        )
     if not counts:
         return f"(no non-missing values found in column {column!r}; rows_scanned={scanned})"
 
     lines = []
     lines.append(f"column: {header[idx]!r}")
     lines.append(f"rows_scanned: {scanned}")
+    if note:
+        lines.append(f"cache: {note}")
+    if approximate:
+        std_err = 104.0 / math.sqrt(1 << _HLL_P)
+        lines.append(f"distinct_values: ~{result.distinct()} (HyperLogLog, std. error {std_err:.1f}%)")
+        lines.append(f"count_error: counts may be up to {result.error} below the true count")
+    else:
+        lines.append(f"distinct_values: {len(counts)}")
     lines.append("")
 
     for val, c in counts.most_common(top_k):
@@ -203,6 +2084,80 @@ async def csv_top_values(
     return "\n".join(lines)
 
 
+@mcp.tool()
+async def csv_query(
+    file_path: str,
+    where: str = "",
+    group_by: str = "",
+    aggregates: str = "count",
+    delimiter: str = "",
+    max_rows: int = 0,
+    limit: int = 100,
+) -> str:
+    """Filter rows and compute aggregates, optionally per group, in one streaming pass.
+
+    where: comparisons such as ``country = DE and amount > 10 or note ~ "rush"``.
+    group_by: columns, ``date[:7]`` groups by the first 7 characters.
+    aggregates: ``count``, ``count(col)``, ``sum(col)``, ``avg(col)``,
+    ``min(col)``, ``max(col)``. sum and avg skip non-numeric values; min and
+    max compare strings (e.g. ISO dates) when a column has no numbers.
+    max_rows <= 0 scans the whole file; limit caps the groups listed.
+    """
+    max_rows = int(max_rows)
+    limit_rows = max_rows if max_rows > 0 else None
+    limit = max(1, min(int(limit), 1000))
+    p = _csv_path(file_path)
+
+    def parse(header: list[str]) -> tuple:
+        return _parse_where(where, header), _parse_group_by(group_by, header), _parse_aggregates(aggregates, header)
+
+    dialect = _dialect(p, delimiter)
+    try:
+        found = _resolve_columns(p, dialect, parse)
+    except ValueError as e:
+        return f"query error: {e}"
+    if found is None:
+        return "empty file"
+    dialect, header, data_start, (where_plan, group, aggs) = found
+    used = [c[0] for clause in where_plan for c in clause] + [i for i, _ in group]
+    used += [i for _, i in aggs if i is not None]
+    plan = _QueryPlan(where_plan, group, aggs, max(used, default=-1) + 1)
+
+    parquet = _columnar_load(p, dialect)
+    try:
+        if parquet is not None:
+            rows = _columnar_rows(parquet, sorted(set(used)), plan.width, limit_rows)
+            result, scanned = _run_query(plan, islice(rows, limit_rows))
+        elif data_start is None:
+            result, scanned = _run_query(plan, islice(_text_rows(p, dialect), limit_rows))
+        else:
+            size = p.stat().st_size
+            result, scanned, _ = await _scan(p, data_start, size, limit_rows, _query_range, dialect, plan)
+    except ValueError as e:
+        return f"query error: {e}"
+
+    lines = []
+    lines.append(f"rows_scanned: {scanned}")
+    lines.append(f"rows_matched: {result.matched}")
+    if group:
+        lines.append(f"groups: {len(result.groups)}")
+    if parquet is not None:
+        lines.append("cache: columnar")
+    lines.append("")
+    names = [header[i] + (f"[:{n}]" if n else "") for i, n in group]
+    lines.append("\t".join(names + [_agg_name(header, fn, i) for fn, i in aggs]))
+
+    if not group and not result.groups:
+        result.new_group(())
+    keys = sorted(result.groups)
+    for key in keys[:limit]:
+        values = [_fmt_number(v) for v in result.values(result.groups[key])]
+        lines.append("\t".join([k.replace("\n", "\\n") for k in key] + values))
+    if len(keys) > limit:
+        lines.append(f"... {len(keys) - limit} more groups")
+    return "\n".join(lines)
+
+
 def main() -> None:
     mcp.run()
 
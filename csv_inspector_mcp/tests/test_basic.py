@@ -1,9 +1,21 @@
 import asyncio
+import csv
+import gzip
+import os
+import time
+from concurrent.futures import wait
 from pathlib import Path
 
+import pytest
+
 from csv_inspector import server as srv
 
 
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", None)
+
+
 def test_csv_head_returns_header_and_rows(tmp_path: Path):
     p = tmp_path / "a.csv"
     p.write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
@@ -28,3 +40,349 @@ def test_csv_top_values_counts(tmp_path: Path):
     out = asyncio.run(srv.csv_top_values(str(p), column="color", top_k=2))
     assert "2\tred" in out
     assert "1\tblue" in out
+
+
+def test_csv_profile_chunk_matches_per_value_classification():
+    values = [f"{i}" for i in range(40)] + [
+        " 7 ", "-3", "1_000", "007", "0", "2.5", "1e3", "nan", "inf", "-.5",
+        "true", "No", "NA", " null ", "", "n/a", "abc", "2024-01-01", "1__0", "0x1f",
+    ]
+    expected = srv._ColStats(name="v")
+    for v in values:
+        expected.add(srv._classify_value(v))
+
+    fast = srv._ColStats(name="v")
+    srv._profile_chunk([fast], [[v] for v in values])
+    assert fast == expected
+
+    # embedded newlines fall back to per-value classification
+    multiline = srv._ColStats(name="v")
+    srv._profile_chunk([multiline], [[v] for v in values + ["a\nb"]])
+    assert multiline.strings == expected.strings + 1
+
+
+def test_csv_profile_chunk_numbers_match_per_value_path():
+    values = [f"{i}" for i in range(40)] + ["0999", " 0123 ", "007", "0", "-0", "2.5", "inf", "abc"]
+    per_value = srv._ColStats(name="v")
+    srv._profile_values(per_value, ((v, 1) for v in values))
+    chunk = srv._ColStats(name="v")
+    srv._profile_chunk([chunk], [[v] for v in values])
+
+    assert chunk == per_value
+    assert (chunk.numbers, chunk.low, chunk.high) == (per_value.numbers, per_value.low, per_value.high) == (43, 0, 39)
+    assert chunk.mean == pytest.approx(per_value.mean)
+    assert chunk.m2 == pytest.approx(per_value.m2)
+    assert (chunk.lengths, chunk.length_total) == (per_value.lengths, per_value.length_total)
+
+
+def test_csv_profile_whole_file(tmp_path: Path):
+    p = tmp_path / "a.csv"
+    p.write_text("x\n" + "".join(f"{i}\n" for i in range(20_000)), encoding="utf-8")
+    out = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    assert "rows_scanned: 20000" in out
+    assert "x\tint\t0\t0.0" in out
+
+
+def test_parallel_scan_matches_sequential(tmp_path: Path, monkeypatch):
+    p = tmp_path / "q.csv"
+    rows = []
+    for i in range(3000):
+        text = ['plain', '"two\nlines, ""quoted"""', '"a,b"', "", "NA"][i % 5]
+        rows.append(f"{i},{text},{i % 7}" + ("\r\n" if i % 2 else "\n"))
+    p.write_text("id,text,val\n" + "".join(rows), encoding="utf-8", newline="")
+
+    sequential = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    top_sequential = asyncio.run(srv.csv_top_values(str(p), column="text", max_rows=0))
+
+    monkeypatch.setattr(srv, "_PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(srv, "_WORKERS", 3)
+    monkeypatch.setattr(srv, "_executor", None)
+    parallel = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    # Quantiles are sketch estimates that depend on how the rows were split;
+    # everything else must match exactly.
+    seq_lines, par_lines = sequential.split("\n"), parallel.split("\n")
+    assert len(seq_lines) == len(par_lines)
+    in_numeric = False
+    for seq, par in zip(seq_lines, par_lines):
+        if in_numeric and seq:
+            seq_cells, par_cells = seq.split("\t"), par.split("\t")
+            assert seq_cells[:2] + seq_cells[5:] == par_cells[:2] + par_cells[5:]
+            for a, b in zip(seq_cells[2:5], par_cells[2:5]):
+                assert abs(float(a) - float(b)) <= 3000 * 2 * 1.7 / srv._QUANTILE_K
+        else:
+            assert seq == par
+        in_numeric = seq.startswith("numeric\t") or (in_numeric and bool(seq))
+    assert asyncio.run(srv.csv_top_values(str(p), column="text", max_rows=0)) == top_sequential
+    assert "rows_scanned: 3000" in sequential
+
+
+def test_value_sketch_bounds():
+    sketch = srv._ValueSketch(capacity=20)
+    for chunk in range(10):
+        values = {f"u{chunk}_{i}": 1 for i in range(2000)}
+        values.update({"hot": 500, "warm": 200})
+        sketch.add_counts(srv.Counter(values))
+
+    assert sketch.total == 10 * 2700
+    assert sketch.error <= sketch.total / 21
+    for value, true_count in (("hot", 5000), ("warm", 2000)):
+        assert true_count - sketch.error <= sketch.counts[value] <= true_count
+    assert abs(sketch.distinct() - 20_002) / 20_002 < 0.05
+
+
+def test_csv_top_values_approximate(tmp_path: Path):
+    p = tmp_path / "a.csv"
+    p.write_text("color\n" + "red\n" * 5 + "blue\n" * 3 + "NA\n", encoding="utf-8")
+    out = asyncio.run(srv.csv_top_values(str(p), column="color", approximate=True))
+    assert "distinct_values: ~2 " in out
+    assert "count_error: counts may be up to 0 below the true count" in out
+    assert "5\tred" in out and "3\tblue" in out
+
+
+def test_result_cache_hits_and_extends_on_append(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    p = tmp_path / "a.csv"
+    p.write_text("id,color\n1,red\n2,blue\n", encoding="utf-8")
+
+    first = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    assert "cache:" not in first
+    assert "cache: hit" in asyncio.run(srv.csv_profile(str(p), max_rows=0))
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write('3,"multi\nline"\n4,red\n')
+    extended = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    assert "cache: extended with 2 appended rows" in extended
+    assert "rows_scanned: 4" in extended
+
+    monkeypatch.setattr(srv, "_CACHE_DIR", None)
+    fresh = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    assert extended.replace("cache: extended with 2 appended rows\n", "") == fresh
+
+    # Rewriting the file in place (same size) invalidates the entry
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    assert "2\tred" in asyncio.run(srv.csv_top_values(str(p), column="color"))
+    p.write_text(p.read_text(encoding="utf-8").replace("red", "tan"), encoding="utf-8")
+    top = asyncio.run(srv.csv_top_values(str(p), column="color"))
+    assert "cache:" not in top and "2\ttan" in top
+
+
+def test_csv_rows_seeks_with_row_index(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_INDEX_BLOCK", 64)
+    monkeypatch.setattr(srv, "_INDEX_MIN_ROW", 0)
+    p = tmp_path / "a.csv"
+    with p.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "note"])
+        for i in range(300):
+            w.writerow([i, f'line\n"{i}"' if i % 7 == 0 else f"n{i}"])
+
+    out = asyncio.run(srv.csv_rows(str(p), start=140, count=3))
+    assert out.split("\n") == ["row\tid\tnote", '140\t140\tline\\n"140"', "141\t141\tn141", "142\t142\tn142"]
+    assert asyncio.run(srv.csv_rows(str(p), start=300)) == f"(no rows: {p} has 300 data rows)"
+
+
+def test_csv_rows_keeps_row_index_in_memory(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_INDEX_BLOCK", 64)
+    monkeypatch.setattr(srv, "_INDEX_MIN_ROW", 0)
+    monkeypatch.setattr(srv, "_CACHE_DIR", None)
+    builds = []
+    index_range = srv._index_range
+    monkeypatch.setattr(srv, "_index_range", lambda *a: builds.append(a) or index_range(*a))
+    p = tmp_path / "a.csv"
+    p.write_text("id\n" + "".join(f"{i}\n" for i in range(300)), encoding="utf-8")
+
+    assert asyncio.run(srv.csv_rows(str(p), start=200, count=1)).split("\n")[1] == "200\t200"
+    assert asyncio.run(srv.csv_rows(str(p), start=250, count=1)).split("\n")[1] == "250\t250"
+    assert len(builds) == 1
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write("300\n")
+    assert asyncio.run(srv.csv_rows(str(p), start=300, count=1)).split("\n")[1] == "300\t300"
+    assert len(builds) == 2
+
+
+def test_csv_query_filters_groups_and_aggregates(tmp_path: Path):
+    p = tmp_path / "sales.csv"
+    p.write_text(
+        "date,country,amount,note\n"
+        "2024-01-05,DE,10,\n"
+        "2024-01-20,DE,2.5,\"rush, \"\"priority\"\"\nline\"\n"
+        "2024-02-01,DE,NA,\n"
+        "2024-02-03,FR,7,rush\n"
+        "2024-02-09,DE,4,\n",
+        encoding="utf-8",
+    )
+    out = asyncio.run(srv.csv_query(
+        str(p),
+        where='country = DE or note ~ "rush"',
+        group_by="date[:7]",
+        aggregates="count, sum(amount), avg(amount), max(date)",
+    ))
+    assert out.split("\n") == [
+        "rows_scanned: 5",
+        "rows_matched: 5",
+        "groups: 2",
+        "",
+        "date[:7]\tcount\tsum(amount)\tavg(amount)\tmax(date)",
+        "2024-01\t2\t12.5\t6.25\t2024-01-20",
+        "2024-02\t3\t11\t5.5\t2024-02-09",
+    ]
+
+    out = asyncio.run(srv.csv_query(str(p), where="amount >= 4 and country != FR"))
+    assert out.endswith("rows_matched: 2\n\ncount\n2")
+    assert asyncio.run(srv.csv_query(str(p), where="amount >")).startswith("query error: expected")
+
+
+def test_dialect_is_sniffed_and_cached(tmp_path: Path, monkeypatch):
+    p = tmp_path / "a.csv"
+    p.write_bytes("﻿name;price\nBjörk;1,5\nAnna;2,25\n".encode("utf-8"))
+    out = asyncio.run(srv.csv_profile(str(p)))
+    assert "delimiter: ';'\nencoding: utf-8\nrows_scanned: 2" in out
+    assert "name\t" in out and "price\t" in out
+
+    sniffed = []
+    sniff = srv._sniff
+    monkeypatch.setattr(srv, "_sniff", lambda *args: sniffed.append(args) or srv._Dialect())
+    asyncio.run(srv.csv_top_values(str(p), column="name"))
+    assert sniffed == []
+
+    q = tmp_path / "b.csv"
+    q.write_bytes("1\tJosé\n2\tZoë\n".encode("cp1252"))
+    monkeypatch.setattr(srv, "_sniff", sniff)
+    assert srv._dialect(q) == srv._Dialect(delimiter="\t", encoding="cp1252", header=False)
+    assert asyncio.run(srv.csv_rows(str(q), start=1)) == "row\tcol_0\tcol_1\n1\t2\tZoë"
+
+
+def test_csv_profile_numeric_and_length_stats(tmp_path: Path):
+    p = tmp_path / "a.csv"
+    rows = [f"{i},{'x' * (i % 5 + 1)}\n" for i in range(1, 301)]
+    p.write_text("n,word\n" + "".join(rows) + "NA,\n", encoding="utf-8")
+    out = asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    assert "numeric\tmin\tp25\tmedian\tp75\tmax\tmean\tstd\nn\t1\t75\t150\t225\t300\t150.5\t86.7468" in out
+    assert "text\tmin_len\tmean_len\tmax_len\nword\t1\t3.0\t5" in out
+
+    sketch = srv._Quantiles()
+    values = [(i * 7919) % 100_000 for i in range(100_000)]
+    for start in range(0, len(values), 8192):
+        sketch.add_values(values[start : start + 8192])
+    for q in srv._QUANTILES:
+        assert abs(sketch.quantile(q) / 100_000 - q) < 0.01
+    assert sum(map(len, sketch.levels)) <= 3 * sketch.k
+
+
+def test_compressed_input_is_streamed(tmp_path: Path, monkeypatch):
+    p = tmp_path / "a.csv.gz"
+    p.write_bytes(gzip.compress(b"id,color\n1,red\n2,blue\n3,red\n"))
+    profile = asyncio.run(srv.csv_profile(str(p)))
+    assert "compression: gzip\nrows_scanned: 3" in profile
+    assert "2\tred" in asyncio.run(srv.csv_top_values(str(p), column="color"))
+    assert asyncio.run(srv.csv_rows(str(p), start=2)) == "row\tid\tcolor\n2\t3\tred"
+
+    z = tmp_path / "b.csv.zst"
+    z.write_bytes(b"\x28\xb5\x2f\xfd" + bytes(16))
+    monkeypatch.setattr(srv, "_zstd", None)
+    monkeypatch.setattr(srv, "zstandard", None)
+    with pytest.raises(RuntimeError, match="install the 'zstandard' package"):
+        asyncio.run(srv.csv_head(str(z)))
+
+
+def test_columnar_cache_is_built_read_and_invalidated(tmp_path: Path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    p = tmp_path / "a.csv"
+    p.write_text("id,price,color\n1,2.50,red\n2,,blue\n3,4,\"r\ned\"\n4,1e3,red\n", encoding="utf-8")
+    expected = asyncio.run(srv.csv_profile(str(p), max_rows=2))
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(srv, "_COLUMNAR", True)
+
+    asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    # The copy is written on the process pool after the profile returns.
+    wait(list(srv._columnar_builds.values()))
+    (parquet,) = (tmp_path / "cache").glob("*.parquet")
+    assert srv._columnar_quotes_odd(parquet) is False
+    # Results read from Parquet take the quote parity from its metadata.
+    monkeypatch.setattr(srv, "_count_quotes", None)
+    profile = asyncio.run(srv.csv_profile(str(p), max_rows=2))
+    assert profile.replace("cache: columnar\n", "") == expected
+    top = asyncio.run(srv.csv_top_values(str(p), column="color"))
+    assert "2\tred" in top and "cache: columnar" in top
+    query = asyncio.run(srv.csv_query(str(p), where="price > 2", aggregates="count, sum(id)"))
+    assert query.splitlines()[-1] == "3\t8"
+
+    p.write_text("id,color\n1,red\n", encoding="utf-8")
+    assert "cache: columnar" not in asyncio.run(srv.csv_query(str(p)))
+    assert not list((tmp_path / "cache").glob("*.parquet"))
+
+
+def test_csv_rows_index_falls_back_on_stray_quotes(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(srv, "_INDEX_BLOCK", 256)
+    p = tmp_path / "a.csv"
+    lines = [f'{i},5" tall,x' if i % 1000 == 1 else f"{i},short,x" for i in range(30_000)]
+    p.write_text("id,height,flag\n" + "\n".join(lines) + "\n", encoding="utf-8")
+
+    index = srv._index_range(str(p), len("id,height,flag\n"), p.stat().st_size, ",")[0]
+    assert not index.exact
+
+    for _ in range(2):  # built, then read back from the cache
+        out = asyncio.run(srv.csv_rows(str(p), start=20_001, count=2))
+        assert out.split("\n") == ["row\tid\theight\tflag", '20001\t20001\t5" tall\tx', "20002\t20002\tshort\tx"]
+        assert asyncio.run(srv.csv_rows(str(p), start=30_000)) == f"(no rows: {p} has 30000 data rows)"
+
+
+def test_numeric_header_is_kept_as_header(tmp_path: Path):
+    p = tmp_path / "years.csv"
+    p.write_text("2019,2020,2021\n" + "".join(f"{i},{i % 3},{i * 2}\n" for i in range(30)), encoding="utf-8")
+    assert srv._dialect(p).header
+
+    profile = asyncio.run(srv.csv_profile(str(p)))
+    assert "rows_scanned: 30" in profile and "2019\tint\t0\t0.0" in profile
+    top = asyncio.run(srv.csv_top_values(str(p), column="2020"))
+    assert "rows_scanned: 30" in top and "10\t0" in top
+    query = asyncio.run(srv.csv_query(str(p), where="2020 = 1", aggregates="count,sum(2019)"))
+    assert query.split("\n")[-1] == "10\t145"
+
+
+def test_column_found_in_first_row_sniffed_as_data(tmp_path: Path):
+    p = tmp_path / "pairs.csv"
+    p.write_text("name,1\n" + "".join(f"n{i},{i % 2}\n" for i in range(10)), encoding="utf-8")
+    assert not srv._dialect(p).header
+
+    top = asyncio.run(srv.csv_top_values(str(p), column="1"))
+    assert "rows_scanned: 10" in top and "5\t0" in top
+    assert "unknown column: 'x'" in asyncio.run(srv.csv_top_values(str(p), column="x"))
+
+
+def test_sequential_scan_counts_quotes_in_the_same_pass(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(srv, "_count_quotes", None)
+    p = tmp_path / "a.csv"
+    p.write_text('id,note\n1,"a ""b"""\n2,"open\nclose"\n', encoding="utf-8")
+
+    asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    with p.open("a", encoding="utf-8") as f:
+        f.write("3,c\n")
+    # The stored quote count was even, so the appended row is scanned on its own.
+    assert "cache: extended with 1 appended rows" in asyncio.run(srv.csv_profile(str(p), max_rows=0))
+
+
+def test_result_cache_is_pruned_by_age_and_size(tmp_path: Path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(srv, "_CACHE_DIR", cache)
+    monkeypatch.setattr(srv, "_cache_pruned", 0.0)
+    cache.mkdir()
+    old = time.time() - srv._CACHE_MAX_AGE - 60
+    for stem in ("stale", "older", "newer"):
+        for suffix in (".json", ".parquet"):
+            (cache / f"{stem}{suffix}").write_bytes(b"x" * 1000)
+    for path in cache.glob("stale.*"):
+        os.utime(path, (old, old))
+    os.utime(cache / "older.json", (old + 120, old + 120))
+    os.utime(cache / "older.parquet", (time.time() - 100, time.time() - 100))
+    monkeypatch.setattr(srv, "_CACHE_MAX_BYTES", 3000)
+
+    p = tmp_path / "a.csv"
+    p.write_text("id\n1\n", encoding="utf-8")
+    asyncio.run(srv.csv_profile(str(p), max_rows=0))
+    names = {f.name for f in cache.iterdir()}
+    # "stale" was unused too long; "older" (last used 100 s ago) made room.
+    assert {"newer.json", "newer.parquet"} < names and len(names) == 3
@@ -1,14 +1,58 @@
 from __future__ import annotations
 
+import fnmatch
 import hashlib
-from dataclasses import dataclass
+import heapq
+import os
+import re
+import sqlite3
+import stat
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
 
 from mcp.server.fastmcp import FastMCP
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 mcp = FastMCP("File Inspector")
 
+# Threads for the parallel tools; directory listing and file reads release the
+# GIL, so threads overlap I/O latency (notably on network filesystems).
+_WORKERS = int(os.getenv("FILE_INSPECTOR_WORKERS", "0")) or min(32, (os.cpu_count() or 1) + 4)
+_executor: ThreadPoolExecutor | None = None
+
+
+# Anything modified within this long of a scan is not cached: a later change
+# in the same timestamp tick would leave its mtime unchanged.
+_RACY_NS = 2_000_000_000
+
+_cache_env = os.getenv("FILE_INSPECTOR_CACHE_DIR")
+_CACHE_DIR: Path | None = (
+    None if _cache_env == "" else Path(_cache_env or "~/.cache/file-inspector").expanduser()
+)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="file-inspector")
+    return _executor
+
 
 def _fmt_mtime(ts: float) -> str:
     # Stable, explicit timezone.
@@ -22,30 +66,624 @@ class _TreeLine:
     is_dir: bool
 
 
-def _iter_tree(root: Path, *, max_depth: int, max_entries: int) -> list[_TreeLine]:
-    lines: list[_TreeLine] = []
+def _list_dir(path: str) -> list[tuple[str, str, bool]]:
+    """Return (name, path, is_dir) for the children of path, directories first.
 
-    def walk(p: Path, depth: int) -> None:
-        if len(lines) >= max_entries:
-            return
-        if depth > max_depth:
+    Uses the type information scandir already has, so no per-entry stat is
+    needed on most filesystems. Unreadable directories list as empty.
+    """
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name, entry.path, is_dir))
+    except OSError:
+        return []
+    entries.sort(key=lambda e: (not e[2], e[0].lower()))
+    return entries
+
+
+# Directory listings requested ahead of the walk in parallel mode.
+_PREFETCH = 64
+
+
+def _iter_tree(root: Path, *, max_depth: int, parallel: bool = False) -> Iterator[_TreeLine]:
+    """Yield the tree under root in display order (depth-first, dirs first).
+
+    Only one directory listing is sorted at a time, so the caller can stop
+    after max_entries without the rest of the tree being read. With
+    ``parallel``, the listings of upcoming directories are fetched on the
+    thread pool while earlier ones are being yielded.
+    """
+    if max_depth < 1:
+        return
+    pending: dict[str, Future] = {}
+
+    def prefetch(entries: list[tuple[str, str, bool]], depth: int) -> None:
+        if not parallel or depth >= max_depth:
             return
+        for _, path, is_dir in entries:
+            if len(pending) >= _PREFETCH:
+                return
+            if is_dir and path not in pending:
+                pending[path] = _pool().submit(_list_dir, path)
+
+    listing = _list_dir(str(root))
+    prefetch(listing, 1)
+    stack = [(1, iter(listing))]
+    try:
+        while stack:
+            depth, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
+            name, path, is_dir = entry
+            yield _TreeLine(depth=depth, name=name, is_dir=is_dir)
+            if is_dir and depth < max_depth:
+                future = pending.pop(path, None)
+                children = future.result() if future else _list_dir(path)
+                prefetch(children, depth + 1)
+                stack.append((depth + 1, iter(children)))
+    finally:
+        for future in pending.values():
+            future.cancel()
+
+
+@dataclass
+class _DirUsage:
+    """What one directory holds directly (subdirectories are listed, not summed)."""
+
+    size: int = 0
+    allocated: int = 0
+    files: int = 0
+    errors: int = 0
+    # (st_dev, st_ino) -> (size, allocated) for files with several hard links,
+    # kept apart so each is counted once however many names it has.
+    links: dict[tuple[int, int], tuple[int, int]] = field(default_factory=dict)
+    largest: list[tuple[int, str]] = field(default_factory=list)
+    subdirs: list[str] = field(default_factory=list)
+
 
+# Directory listings (entry path, is_dir) keyed by path and checked against
+# the directory's mtime_ns, which changes whenever an entry is created,
+# removed or renamed. Writing to a file leaves it unchanged, so files are
+# stat'ed again on every scan.
+_usage_cache: dict[str, tuple[int, list[tuple[str, bool]]]] = {}
+_USAGE_CACHE_MAX = 200_000
+_USAGE_TOP = 100
+
+
+def _scan_usage(path: str) -> tuple[_DirUsage | None, bool]:
+    """Summarize one directory; returns (summary or None if unreadable, listing from cache)."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+    cached = _usage_cache.get(path)
+    from_cache = cached is not None and cached[0] == mtime_ns
+    if from_cache:
+        listing = cached[1]
+    else:
+        listing = []
         try:
-            entries = sorted(p.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    listing.append((entry.path, is_dir))
         except OSError:
-            return
+            return None, False
+        if time.time_ns() - mtime_ns > _RACY_NS:
+            if len(_usage_cache) >= _USAGE_CACHE_MAX:
+                _usage_cache.clear()
+            _usage_cache[path] = (mtime_ns, listing)
 
-        for child in entries:
-            if len(lines) >= max_entries:
-                return
-            is_dir = child.is_dir()
-            lines.append(_TreeLine(depth=depth, name=child.name, is_dir=is_dir))
-            if is_dir:
-                walk(child, depth + 1)
+    usage = _DirUsage()
+    files: list[tuple[int, str]] = []
+    for entry_path, is_dir in listing:
+        if is_dir:
+            usage.subdirs.append(entry_path)
+            continue
+        try:
+            st = os.lstat(entry_path)
+        except OSError:
+            usage.errors += 1
+            continue
+        allocated = st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+        if st.st_nlink > 1:
+            usage.links[(st.st_dev, st.st_ino)] = (st.st_size, allocated)
+        else:
+            usage.size += st.st_size
+            usage.allocated += allocated
+            usage.files += 1
+        files.append((st.st_size, entry_path))
+    usage.largest = heapq.nlargest(_USAGE_TOP, files)
+    return usage, from_cache
+
+
+def _walk_usage(root: str, parallel: bool) -> tuple[dict[str, _DirUsage], int, int]:
+    """Summarize every directory under root; returns (summaries, cached, unreadable)."""
+    summaries: dict[str, _DirUsage] = {}
+    cached = unreadable = 0
+
+    def add(path: str, usage: _DirUsage | None, from_cache: bool) -> list[str]:
+        nonlocal cached, unreadable
+        if usage is None:
+            unreadable += 1
+            return []
+        summaries[path] = usage
+        cached += from_cache
+        return usage.subdirs
+
+    if parallel:
+        futures = {_pool().submit(_scan_usage, root): root}
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = futures.pop(future)
+                for sub in add(path, *future.result()):
+                    futures[_pool().submit(_scan_usage, sub)] = sub
+    else:
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            stack.extend(add(path, *_scan_usage(path)))
+    return summaries, cached, unreadable
+
+
+def _usage_totals(usages: list[_DirUsage]) -> tuple[int, int, int]:
+    """Return (size, allocated, files), counting each hard-linked file once."""
+    links: dict[tuple[int, int], tuple[int, int]] = {}
+    for usage in usages:
+        links.update(usage.links)
+    size = sum(u.size for u in usages) + sum(s for s, _ in links.values())
+    allocated = sum(u.allocated for u in usages) + sum(a for _, a in links.values())
+    return size, allocated, sum(u.files for u in usages) + len(links)
+
+
+_TAIL_BLOCK = 64 * 1024
+_RANGE_MAX = 64 * 1024
+_LINE_BLOCK = 1024 * 1024
+_LINE_SIG_BYTES = 4096
+_LINE_INDEXES_MAX = 32
+
+
+@dataclass
+class _LineIndex:
+    """Sparse line index: one checkpoint per _LINE_BLOCK bytes scanned so far.
+
+    lines[k] is the number of newlines before offsets[k]. The index covers
+    [0, end) and is extended on demand, so reaching line N costs one read up
+    to N the first time and a seek plus at most one block afterwards.
+    """
+
+    dev: int
+    ino: int
+    size: int
+    mtime_ns: int
+    offsets: list[int] = field(default_factory=lambda: [0])
+    lines: list[int] = field(default_factory=lambda: [0])
+    end: int = 0
+    end_lines: int = 0
+    sig: bytes = b""
+    # Looked up within _RACY_NS of the file's mtime: an equal size and mtime
+    # don't prove the file unchanged.
+    racy: bool = False
+
+
+_line_indexes: dict[str, _LineIndex] = {}
+
+
+def _index_sig(f, end: int) -> bytes:
+    f.seek(max(0, end - _LINE_SIG_BYTES))
+    return hashlib.blake2b(f.read(min(end, _LINE_SIG_BYTES)), digest_size=16).digest()
+
+
+def _line_index(path: str, f, st: os.stat_result) -> _LineIndex:
+    """Return the cached index for path if it still describes the file, else a new one.
+
+    An index survives appends: the file must be the same inode, no shorter,
+    and the bytes just before the indexed end must be unchanged.
+    """
+    racy = time.time_ns() - st.st_mtime_ns <= _RACY_NS
+    index = _line_indexes.get(path)
+    if index is not None and (index.dev, index.ino) == (st.st_dev, st.st_ino):
+        if (index.size, index.mtime_ns) == (st.st_size, st.st_mtime_ns) and not index.racy:
+            return index
+        if st.st_size > index.size and _index_sig(f, index.end) == index.sig:
+            index.size, index.mtime_ns, index.racy = st.st_size, st.st_mtime_ns, racy
+            return index
+    index = _LineIndex(dev=st.st_dev, ino=st.st_ino, size=st.st_size, mtime_ns=st.st_mtime_ns, racy=racy)
+    if len(_line_indexes) >= _LINE_INDEXES_MAX:
+        del _line_indexes[next(iter(_line_indexes))]
+    _line_indexes[path] = index
+    return index
+
+
+def _seek_line(f, index: _LineIndex, skip: int) -> bool:
+    """Position f at the start of the line after ``skip`` newlines; False if there is none."""
+    if skip == 0:
+        f.seek(0)
+        return True
+    found = _seek_indexed(f, index, skip)
+    if found is None:
+        # The file was changed in place since it was indexed; start over.
+        st = os.fstat(f.fileno())
+        index.size, index.mtime_ns, index.racy = st.st_size, st.st_mtime_ns, True
+        index.offsets, index.lines = [0], [0]
+        index.end = index.end_lines = 0
+        found = _seek_indexed(f, index, skip)
+    return bool(found)
+
+
+def _seek_indexed(f, index: _LineIndex, skip: int) -> bool | None:
+    """_seek_line for skip > 0; None if a read comes up short of the index."""
+    if index.end_lines < skip and index.end < index.size:
+        f.seek(index.end)
+        while index.end_lines < skip and index.end < index.size:
+            if index.end % _LINE_BLOCK == 0 and index.end:
+                index.offsets.append(index.end)
+                index.lines.append(index.end_lines)
+            block = f.read(_LINE_BLOCK - index.end % _LINE_BLOCK)
+            if not block:
+                return None
+            index.end += len(block)
+            index.end_lines += block.count(b"\n")
+        index.sig = _index_sig(f, index.end)
+    if index.end_lines < skip:
+        return False
+
+    # The last checkpoint with fewer than ``skip`` newlines before it.
+    k = bisect_left(index.lines, skip) - 1
+    pos, need = index.offsets[k], skip - index.lines[k]
+    f.seek(pos)
+    while True:
+        block = f.read(_LINE_BLOCK)
+        if not block:
+            return None
+        n = block.count(b"\n")
+        if n < need:
+            need -= n
+            pos += len(block)
+            continue
+        at = -1
+        for _ in range(need):
+            at = block.find(b"\n", at + 1)
+        f.seek(pos + at + 1)
+        return True
+
+
+def _iter_files(root: str, include: str = "*", exclude: tuple[str, ...] = ()) -> Iterator[str]:
+    """Yield the files under root whose name matches include, in sorted order.
+
+    Files and directories whose name matches an exclude glob are skipped;
+    symlinked directories are not followed.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not any(fnmatch.fnmatch(d, g) for g in exclude))
+        for name in sorted(filenames):
+            if fnmatch.fnmatch(name, include) and not any(fnmatch.fnmatch(name, g) for g in exclude):
+                yield os.path.join(dirpath, name)
 
-    walk(root, 1)
-    return lines
+
+_GREP_BLOCK = 1024 * 1024
+_GREP_MAX_LINE = 16 * 1024 * 1024
+_GREP_LINE_CHARS = 300
+_BINARY_SNIFF = 8192
+
+
+def _grep_file(
+    path: str, regex: re.Pattern[bytes] | None, needle: bytes, limit: int, stop: threading.Event
+) -> list[tuple[int, str]] | None:
+    """Return up to limit (line number, line) matches in path; None if it looks binary.
+
+    The file is read in blocks cut at the last newline, so no line is split
+    between searches. Without a regex, needle is found with bytes.find.
+    """
+    hits: list[tuple[int, str]] = []
+    line_no = 1
+    carry = b""
+    with open(path, "rb") as f:
+        head = True
+        while not stop.is_set():
+            block = f.read(_GREP_BLOCK)
+            if head and b"\0" in block[:_BINARY_SNIFF]:
+                return None
+            head = False
+            data = carry + block
+            if block:
+                cut = data.rfind(b"\n") + 1
+                if cut == 0 and len(data) < _GREP_MAX_LINE:
+                    carry = data
+                    continue
+                if cut:
+                    data, carry = data[:cut], data[cut:]
+                else:
+                    carry = b""
+            elif not data:
+                break
+            if regex is not None:
+                # In MULTILINE mode $ only matches before "\n", so CRLF line
+                # ends lose their "\r" (lines are reported without it anyway).
+                data = data.replace(b"\r\n", b"\n")
+
+            counted = pos = 0
+            while True:
+                if regex is None:
+                    at = data.find(needle, pos)
+                else:
+                    m = regex.search(data, pos)
+                    at = m.start() if m else -1
+                # A zero-width match after the final newline is not a line.
+                if at < 0 or (at == len(data) and data.endswith(b"\n")):
+                    break
+                line_no += data.count(b"\n", counted, at)
+                counted = at
+                start = data.rfind(b"\n", 0, at) + 1
+                end = data.find(b"\n", at)
+                end = len(data) if end < 0 else end
+                line = data[start:end].decode("utf-8", errors="replace").rstrip("\r")
+                hits.append((line_no, line[:_GREP_LINE_CHARS]))
+                if len(hits) >= limit:
+                    return hits
+                pos = end + 1
+                if pos > len(data):
+                    break
+            line_no += data.count(b"\n", counted)
+            if not block:
+                break
+    return hits
+
+
+def _grep_files(
+    files: Iterator[str], regex: re.Pattern[bytes] | None, needle: bytes, max_matches: int
+) -> tuple[list[tuple[str, int, str]], int, int, int, bool]:
+    """Search files on the thread pool, keeping results in file order.
+
+    At most 2 * _WORKERS files are in flight; once max_matches lines are
+    found, running searches are told to stop and the rest are not started.
+    Returns (matches, files searched, binary files skipped, unreadable files,
+    whether the cap was reached).
+    """
+    stop = threading.Event()
+    window: deque[tuple[str, Future]] = deque()
+    matches: list[tuple[str, int, str]] = []
+    searched = binary = unreadable = 0
+
+    def submit() -> None:
+        path = next(files, None)
+        if path is not None:
+            window.append((path, _pool().submit(_grep_file, path, regex, needle, max_matches, stop)))
+
+    for _ in range(2 * _WORKERS):
+        submit()
+    try:
+        while window:
+            path, future = window.popleft()
+            try:
+                hits = future.result()
+            except OSError:
+                unreadable += 1
+                hits = []
+            if hits is None:
+                binary += 1
+                hits = []
+            else:
+                searched += 1
+            for line_no, line in hits:
+                matches.append((path, line_no, line))
+                if len(matches) >= max_matches:
+                    return matches, searched, binary, unreadable, True
+            submit()
+    finally:
+        stop.set()
+        for _, future in window:
+            future.cancel()
+    return matches, searched, binary, unreadable, False
+
+
+_HASH_BLOCK = 4 * 1024 * 1024
+_HASHLIB_ALGORITHMS = ("sha256", "sha1", "sha512", "md5", "blake2b")
+_XXHASH_ALGORITHMS = ("xxh64", "xxh3_64", "xxh3_128")
+
+
+def _new_hash(algorithm: str):
+    """Return a fresh hash object; raises ValueError if algorithm is unknown or not installed."""
+    if algorithm in _HASHLIB_ALGORITHMS:
+        return hashlib.new(algorithm)
+    if algorithm == "blake3":
+        if blake3 is None:
+            raise ValueError("blake3 needs the 'blake3' package")
+        return blake3.blake3()
+    if algorithm in _XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"{algorithm} needs the 'xxhash' package")
+        return getattr(xxhash, algorithm)()
+    known = ", ".join(_HASHLIB_ALGORITHMS + ("blake3",) + _XXHASH_ALGORITHMS)
+    raise ValueError(f"unknown algorithm {algorithm!r} (expected one of: {known})")
+
+
+def _hash_file(path: str, algorithm: str) -> tuple[str, int]:
+    """Return (hex digest, bytes read), reading into one reused 4 MB buffer."""
+    h = _new_hash(algorithm)
+    buf = bytearray(_HASH_BLOCK)
+    view = memoryview(buf)
+    total = 0
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+            total += n
+    return h.hexdigest(), total
+
+
+# Digests record when they were last used (unix seconds). Every
+# _HASH_PRUNE_INTERVAL seconds, those unused for _HASH_MAX_AGE are deleted,
+# then the least recently used beyond _HASH_MAX_ROWS.
+_HASH_MAX_AGE = 30 * 24 * 3600
+_HASH_MAX_ROWS = 1_000_000
+_HASH_PRUNE_INTERVAL = 600
+_hash_pruned = 0.0
+
+
+def _hash_db() -> sqlite3.Connection | None:
+    """Open the digest cache, or return None if it is disabled or unavailable."""
+    if _CACHE_DIR is None:
+        return None
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(_CACHE_DIR / "hashes.sqlite3")
+        with db:
+            db.execute("DROP TABLE IF EXISTS hashes")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS digests (path TEXT, algorithm TEXT, size INTEGER,"
+                " mtime_ns INTEGER, inode INTEGER, digest TEXT, used INTEGER, PRIMARY KEY (path, algorithm))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS digests_used ON digests (used)")
+    except (OSError, sqlite3.Error):
+        return None
+    return db
+
+
+def _hash_prune(db: sqlite3.Connection) -> None:
+    global _hash_pruned
+    now = time.time()
+    if now - _hash_pruned < _HASH_PRUNE_INTERVAL:
+        return
+    _hash_pruned = now
+    with db:
+        db.execute("DELETE FROM digests WHERE used < ?", (int(now) - _HASH_MAX_AGE,))
+        db.execute(
+            "DELETE FROM digests WHERE rowid IN"
+            " (SELECT rowid FROM digests ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (_HASH_MAX_ROWS,),
+        )
+
+
+def _hash_files(paths: list[str], algorithm: str) -> tuple[list[str], int, int]:
+    """Hash paths concurrently, reusing cached digests of unchanged files.
+
+    A cached digest is used while the file's (size, mtime_ns, inode) match.
+    Returns a digest or "error: ..." per path, the number of cached digests
+    used and the number of bytes read.
+    """
+    _new_hash(algorithm)
+    db = _hash_db()
+    results: dict[int, str] = {}
+    todo: list[tuple[int, str, os.stat_result]] = []
+    hits: list[tuple[str, str]] = []
+    cached = read = 0
+    now = int(time.time())
+    try:
+        for i, path in enumerate(paths):
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                results[i] = f"error: {e.strerror}"
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                results[i] = "error: not a file"
+                continue
+            row = None
+            if db is not None:
+                row = db.execute(
+                    "SELECT size, mtime_ns, inode, digest FROM digests WHERE path = ? AND algorithm = ?",
+                    (os.path.abspath(path), algorithm),
+                ).fetchone()
+            if row is not None and tuple(row[:3]) == (st.st_size, st.st_mtime_ns, st.st_ino):
+                results[i] = row[3]
+                cached += 1
+                hits.append((os.path.abspath(path), algorithm))
+            else:
+                todo.append((i, path, st))
+
+        futures = [_pool().submit(_hash_file, path, algorithm) for _, path, _ in todo]
+        fresh = []
+        for (i, path, st), future in zip(todo, futures):
+            try:
+                digest, n = future.result()
+            except OSError as e:
+                results[i] = f"error: {e.strerror}"
+                continue
+            results[i] = digest
+            read += n
+            if time.time_ns() - st.st_mtime_ns > _RACY_NS:
+                fresh.append((os.path.abspath(path), algorithm, st.st_size, st.st_mtime_ns, st.st_ino, digest, now))
+        if db is not None:
+            with db:
+                db.executemany("UPDATE digests SET used = ? WHERE path = ? AND algorithm = ?", [(now, *h) for h in hits])
+                db.executemany("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)", fresh)
+            _hash_prune(db)
+    except sqlite3.Error:
+        pass
+    finally:
+        if db is not None:
+            db.close()
+    return [results[i] for i in range(len(paths))], cached, read
+
+
+_PARTIAL_BYTES = 4096
+_STAT_BATCH = 1024
+
+
+def _stat_files(paths: list[str]) -> list[tuple[str, os.stat_result]]:
+    """lstat paths, keeping regular files only."""
+    out = []
+    for path in paths:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            out.append((path, st))
+    return out
+
+
+def _partial_hash(path: str, size: int) -> tuple[bytes, int]:
+    """Hash the first and last _PARTIAL_BYTES of a file (all of it if small); returns (digest, bytes read)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        if size <= 2 * _PARTIAL_BYTES:
+            data = f.read()
+            h.update(data)
+            return h.digest(), len(data)
+        head = f.read(_PARTIAL_BYTES)
+        f.seek(size - _PARTIAL_BYTES)
+        tail = f.read(_PARTIAL_BYTES)
+    h.update(head)
+    h.update(tail)
+    return h.digest(), len(head) + len(tail)
+
+
+def _regroup(groups: list[list[str]], keys: dict[str, object]) -> list[list[str]]:
+    """Split each group by keys[path], dropping paths without a key and singletons."""
+    out = []
+    for group in groups:
+        split: dict[object, list[str]] = {}
+        for path in group:
+            if path in keys:
+                split.setdefault(keys[path], []).append(path)
+        out += [g for g in split.values() if len(g) > 1]
+    return out
+
+
+def _render_hashes(algorithm: str, names: list[str], digests: list[str], cached: int, read: int) -> str:
+    # Digest lines use the sha256sum layout, so they can be checked with `sha256sum -c`.
+    out = [
+        f"algorithm: {algorithm}",
+        f"files: {len(names)}",
+        f"cached: {cached}",
+        f"bytes_read: {read}",
+        "",
+    ]
+    out += [f"{digest}  {name}" for name, digest in zip(names, digests)]
+    return "\n".join(out)
 
 
 @mcp.tool()
@@ -121,6 +759,132 @@ async def file_head(path: str, lines: int = 40, max_chars: int = 8000) -> str:
     return "".join(out_lines).rstrip("\n")
 
 
+@mcp.tool()
+async def file_tail(path: str, lines: int = 40, max_chars: int = 8000) -> str:
+    """Return the last N lines of a text file (best-effort UTF-8).
+
+    Reads backwards from the end in 64 KB blocks, so the cost does not
+    depend on the size of the file.
+    """
+
+    p = Path(path).expanduser()
+    if not p.exists():
+        return "(missing)"
+    if not p.is_file():
+        return "(not a file)"
+    lines_i = max(0, int(lines))
+    max_chars_i = max(0, int(max_chars))
+
+    data = b""
+    try:
+        with p.open("rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            # A trailing newline ends the last line; it does not start a new one.
+            while pos > 0 and data.rstrip(b"\n").count(b"\n") < lines_i and len(data) < 4 * max_chars_i:
+                step = min(_TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    except OSError as e:
+        return f"error: {e}"
+
+    parts = data.decode("utf-8", errors="replace").split("\n")
+    if parts and parts[-1] == "":
+        parts.pop()
+    out = "\n".join(parts[-lines_i:] if lines_i else [])
+    if not out:
+        return "(empty)"
+    if len(out) > max_chars_i:
+        return "…(truncated)…\n" + out[len(out) - max_chars_i :]
+    return out
+
+
+@mcp.tool()
+async def file_range(path: str, offset: int, length: int = 4096, hex: bool = False) -> str:
+    """Return `length` bytes of a file starting at byte `offset`.
+
+    A negative offset counts from the end of the file. The bytes are decoded
+    as UTF-8 (best effort), or shown as a hex dump with ``hex``. At most 64 KB
+    are returned.
+    """
+
+    p = Path(path).expanduser()
+    if not p.exists():
+        return "(missing)"
+    if not p.is_file():
+        return "(not a file)"
+    length_i = max(0, min(int(length), _RANGE_MAX))
+
+    try:
+        with p.open("rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            offset_i = int(offset)
+            offset_i = max(0, size + offset_i) if offset_i < 0 else min(offset_i, size)
+            f.seek(offset_i)
+            data = f.read(length_i)
+    except OSError as e:
+        return f"error: {e}"
+
+    out = [f"offset: {offset_i}", f"length: {len(data)}", f"size_bytes: {size}", ""]
+    if hex:
+        for i in range(0, len(data), 16):
+            row = data[i : i + 16]
+            text = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+            out.append(f"{offset_i + i:08x}  {row.hex(' '):<47}  {text}")
+    else:
+        out.append(data.decode("utf-8", errors="replace"))
+    return "\n".join(out)
+
+
+@mcp.tool()
+async def file_lines(path: str, start: int = 1, count: int = 40, max_chars: int = 8000) -> str:
+    """Return lines start to start + count - 1 (1-based) of a text file, numbered.
+
+    Far lines are reached through a sparse line index that is kept per file
+    and extended as later lines are requested or the file grows.
+    """
+
+    p = Path(path).expanduser()
+    if not p.exists():
+        return "(missing)"
+    if not p.is_file():
+        return "(not a file)"
+    start_i = max(1, int(start))
+    count_i = max(0, min(int(count), 10_000))
+
+    out_lines: list[str] = []
+    chars = 0
+    try:
+        with p.open("rb") as f:
+            st = os.fstat(f.fileno())
+            index = _line_index(str(p.resolve()), f, st)
+            found = _seek_line(f, index, start_i - 1)
+            for n in range(start_i, start_i + count_i if found else start_i):
+                b = f.readline()
+                if b == b"":
+                    break
+                s = f"{n}\t" + b.decode("utf-8", errors="replace").rstrip("\r\n")
+                if chars + len(s) > max_chars:
+                    out_lines.append("…(truncated)…")
+                    break
+                out_lines.append(s)
+                chars += len(s) + 1
+            if not out_lines and count_i:
+                # Index the rest of the file to report its length.
+                _seek_line(f, index, index.size + 1)
+                unterminated = False
+                if index.size:
+                    f.seek(-1, os.SEEK_END)
+                    unterminated = f.read(1) != b"\n"
+                return f"(no line {start_i}: file has {index.end_lines + unterminated} lines)"
+    except OSError as e:
+        return f"error: {e}"
+
+    if not out_lines:
+        return "(empty)"
+    return "\n".join(out_lines)
+
+
 @mcp.tool()
 async def file_sha256(path: str, max_bytes: int = 10 * 1024 * 1024) -> str:
     """Compute SHA-256 of a local file (streamed).
@@ -161,8 +925,12 @@ async def file_sha256(path: str, max_bytes: int = 10 * 1024 * 1024) -> str:
 
 
 @mcp.tool()
-async def dir_tree(path: str, max_depth: int = 2, max_entries: int = 200) -> str:
-    """Return a simple directory tree (names only) with depth/entry limits."""
+async def dir_tree(path: str, max_depth: int = 2, max_entries: int = 200, parallel: bool = False) -> str:
+    """Return a simple directory tree (names only) with depth/entry limits.
+
+    parallel lists sibling directories concurrently, which helps on slow or
+    network-mounted filesystems.
+    """
 
     root = Path(path).expanduser()
     if not root.exists():
@@ -173,7 +941,7 @@ async def dir_tree(path: str, max_depth: int = 2, max_entries: int = 200) -> str
     max_depth_i = max(0, int(max_depth))
     max_entries_i = max(1, int(max_entries))
 
-    lines = _iter_tree(root, max_depth=max_depth_i, max_entries=max_entries_i)
+    lines = list(islice(_iter_tree(root, max_depth=max_depth_i, parallel=bool(parallel)), max_entries_i))
     if not lines:
         return "(empty)"
 
@@ -189,6 +957,253 @@ async def dir_tree(path: str, max_depth: int = 2, max_entries: int = 200) -> str
     return "\n".join(rendered)
 
 
+@mcp.tool()
+async def dir_usage(path: str, top_n: int = 10, parallel: bool = True) -> str:
+    """Return the recursive size of a directory and where the space goes.
+
+    Output includes total size (apparent and allocated), file and directory
+    counts, the largest top-level entries and the largest files. Files with
+    several hard links are counted once; symlinks are not followed. Each
+    directory's listing is cached until its mtime changes, so repeated calls
+    stat the entries without reading the directories again.
+    """
+
+    root = Path(path).expanduser()
+    if not root.exists():
+        return "(missing)"
+    if not root.is_dir():
+        return "(not a dir)"
+    top_n_i = max(1, min(int(top_n), _USAGE_TOP))
+
+    summaries, cached, unreadable = _walk_usage(str(root), bool(parallel))
+    if str(root) not in summaries:
+        return f"error: cannot read {root}"
+    size, allocated, files = _usage_totals(list(summaries.values()))
+
+    # Group every directory under the top-level entry it belongs to.
+    groups: dict[str, list[_DirUsage]] = {}
+    for dir_path, usage in summaries.items():
+        if dir_path != str(root):
+            top = os.path.relpath(dir_path, root).split(os.sep, 1)[0]
+            groups.setdefault(top + "/", []).append(usage)
+    top_dirs = sorted(((_usage_totals(g)[0], name) for name, g in groups.items()), reverse=True)
+    top_files = heapq.nlargest(top_n_i, (f for u in summaries.values() for f in u.largest))
+
+    out = [
+        f"path: {root}",
+        f"size_bytes: {size}",
+        f"allocated_bytes: {allocated}",
+        f"files: {files}",
+        f"dirs: {len(summaries) - 1}",
+    ]
+    hardlinked = len({key for u in summaries.values() for key in u.links})
+    if hardlinked:
+        out.append(f"hardlinked_files: {hardlinked} (counted once)")
+    errors = unreadable + sum(u.errors for u in summaries.values())
+    if errors:
+        out.append(f"unreadable_entries: {errors}")
+    out.append(f"cached_dirs: {cached}")
+    if top_dirs:
+        out += ["", "largest dirs:"]
+        out += [f"{s}\t{name}" for s, name in top_dirs[:top_n_i]]
+    if top_files:
+        out += ["", "largest files:"]
+        out += [f"{s}\t{os.path.relpath(f, root)}" for s, f in top_files]
+    return "\n".join(out)
+
+
+@mcp.tool()
+async def hash_many(paths: list[str], algorithm: str = "sha256") -> str:
+    """Hash several files concurrently, one `<digest>  <path>` line per file.
+
+    algorithm: sha256 (default), sha1, sha512, md5, blake2b, or the faster
+    blake3 / xxh64 / xxh3_64 / xxh3_128 when their packages are installed.
+    Digests of files unchanged since they were last hashed come from a cache.
+    """
+
+    names = [str(Path(p).expanduser()) for p in paths]
+    if not names:
+        return "(no paths)"
+    try:
+        digests, cached, read = _hash_files(names, algorithm)
+    except ValueError as e:
+        return f"error: {e}"
+    return _render_hashes(algorithm, list(paths), digests, cached, read)
+
+
+@mcp.tool()
+async def hash_tree(path: str, algorithm: str = "sha256", pattern: str = "*", max_files: int = 10000) -> str:
+    """Hash every file under a directory whose name matches pattern.
+
+    Files are listed by relative path in sorted order; symlinks are not
+    followed. See hash_many for the algorithms and the digest cache.
+    """
+
+    root = Path(path).expanduser()
+    if not root.exists():
+        return "(missing)"
+    if not root.is_dir():
+        return "(not a dir)"
+    max_files_i = max(1, int(max_files))
+
+    files = list(islice((f for f in _iter_files(str(root), pattern) if not os.path.islink(f)), max_files_i + 1))
+    if len(files) > max_files_i:
+        return f"error: more than {max_files_i} files match; narrow pattern or raise max_files"
+    if not files:
+        return "(no matching files)"
+    names = sorted(os.path.relpath(f, root) for f in files)
+    try:
+        digests, cached, read = _hash_files([os.path.join(root, n) for n in names], algorithm)
+    except ValueError as e:
+        return f"error: {e}"
+    return _render_hashes(algorithm, names, digests, cached, read)
+
+
+@mcp.tool()
+async def grep_tree(
+    path: str,
+    pattern: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    include: str = "*",
+    exclude: str = ".git,node_modules,__pycache__,.venv",
+    max_matches: int = 200,
+) -> str:
+    """Search file contents under a directory, one `path:line: text` per match.
+
+    pattern is a literal string unless regex is set (Python syntax, matched
+    per line). include is a glob on file names; exclude is a comma-separated
+    list of globs for file and directory names to skip. Binary files (a NUL
+    byte in the first 8 KB) are skipped. Files are searched in parallel and
+    the search stops once max_matches lines have been found.
+    """
+
+    root = Path(path).expanduser()
+    if not root.exists():
+        return "(missing)"
+    if not root.is_dir():
+        return "(not a dir)"
+    if not pattern:
+        return "error: empty pattern"
+    max_matches_i = max(1, min(int(max_matches), 10_000))
+
+    needle = pattern.encode("utf-8")
+    compiled = None
+    if regex or ignore_case:
+        source = needle if regex else re.escape(needle)
+        try:
+            compiled = re.compile(source, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        except re.error as e:
+            return f"error: bad pattern: {e}"
+    globs = tuple(g.strip() for g in exclude.split(",") if g.strip())
+
+    files = _iter_files(str(root), include, globs)
+    matches, searched, binary, unreadable, capped = _grep_files(files, compiled, needle, max_matches_i)
+
+    out = [f"matches: {len(matches)}", f"files_searched: {searched}"]
+    if binary:
+        out.append(f"binary_skipped: {binary}")
+    if unreadable:
+        out.append(f"unreadable: {unreadable}")
+    out.append("")
+    out += [f"{os.path.relpath(f, root)}:{n}: {line}" for f, n, line in matches]
+    if capped:
+        out.append("…(max_matches reached)…")
+    return "\n".join(out)
+
+
+@mcp.tool()
+async def find_duplicates(
+    path: str,
+    min_size: int = 1,
+    include: str = "*",
+    exclude: str = ".git,node_modules,__pycache__,.venv",
+    algorithm: str = "sha256",
+    max_groups: int = 100,
+) -> str:
+    """Find files with identical content under a directory.
+
+    Files are compared in stages, each only on the candidates left by the
+    previous one: size, then a hash of the first and last 4 KB, then a full
+    hash (cached like hash_tree's). Hard links to the same file are not
+    reported as duplicates. Groups are listed by reclaimable bytes.
+    """
+
+    root = Path(path).expanduser()
+    if not root.exists():
+        return "(missing)"
+    if not root.is_dir():
+        return "(not a dir)"
+    try:
+        _new_hash(algorithm)
+    except ValueError as e:
+        return f"error: {e}"
+    min_size_i = max(0, int(min_size))
+    max_groups_i = max(1, int(max_groups))
+    globs = tuple(g.strip() for g in exclude.split(",") if g.strip())
+
+    # Stage 1: size. Several names for one inode count as one file.
+    files = _iter_files(str(root), include, globs)
+    batches = iter(lambda: list(islice(files, _STAT_BATCH)), [])
+    by_size: dict[int, list[str]] = {}
+    inodes: set[tuple[int, int]] = set()
+    scanned = hardlinks = 0
+    for batch in _pool().map(_stat_files, batches):
+        for file_path, st in batch:
+            if st.st_size < min_size_i:
+                continue
+            if (st.st_dev, st.st_ino) in inodes:
+                hardlinks += 1
+                continue
+            inodes.add((st.st_dev, st.st_ino))
+            scanned += 1
+            by_size.setdefault(st.st_size, []).append(file_path)
+    groups = [g for g in by_size.values() if len(g) > 1]
+    after_size = sum(map(len, groups))
+    sizes = {p: size for size, g in by_size.items() for p in g}
+
+    # Stage 2: first and last 4 KB. Small files are read whole, which settles them.
+    candidates = [p for g in groups for p in g]
+    partial: dict[str, bytes] = {}
+    read = 0
+    futures = [_pool().submit(_partial_hash, p, sizes[p]) for p in candidates]
+    for file_path, future in zip(candidates, futures):
+        try:
+            partial[file_path], n = future.result()
+        except OSError:
+            continue
+        read += n
+    groups = _regroup(groups, partial)
+    after_partial = sum(map(len, groups))
+
+    # Stage 3: full hash of what is left.
+    large = [p for g in groups for p in g if sizes[p] > 2 * _PARTIAL_BYTES]
+    digests, _, full_read = _hash_files(large, algorithm)
+    read += full_read
+    full = {p: d for p, d in zip(large, digests) if not d.startswith("error:")}
+    full.update((p, partial[p]) for g in groups for p in g if sizes[p] <= 2 * _PARTIAL_BYTES)
+    groups = _regroup(groups, full)
+
+    groups.sort(key=lambda g: (-sizes[g[0]] * (len(g) - 1), g[0]))
+    out = [
+        f"files: {scanned}",
+        f"same_size: {after_size}",
+        f"same_head_tail: {after_partial}",
+        f"duplicate_groups: {len(groups)}",
+        f"duplicate_files: {sum(len(g) - 1 for g in groups)}",
+        f"reclaimable_bytes: {sum(sizes[g[0]] * (len(g) - 1) for g in groups)}",
+        f"bytes_read: {read}",
+    ]
+    if hardlinks:
+        out.append(f"hardlinks_skipped: {hardlinks}")
+    for group in groups[:max_groups_i]:
+        out += ["", f"{sizes[group[0]]} bytes x {len(group)}"]
+        out += [f"  {os.path.relpath(p, root)}" for p in sorted(group)]
+    if len(groups) > max_groups_i:
+        out += ["", f"… {len(groups) - max_groups_i} more groups"]
+    return "\n".join(out)
+
+
 def main() -> None:
     # Keep the entrypoint tiny for validate_collection.py's AST checks.
     mcp.run()
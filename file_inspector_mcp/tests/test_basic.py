@@ -1,4 +1,6 @@
 import asyncio
+import hashlib
+import os
 from pathlib import Path
 
 from file_inspector import server as srv
@@ -21,3 +23,215 @@ def test_path_stat_directory(tmp_path: Path):
 def test_path_stat_missing():
     result = asyncio.run(srv.path_stat("/nonexistent/path/12345"))
     assert "missing" in result or "not found" in result.lower()
+
+
+def test_dir_tree_order_limits_and_parallel(tmp_path: Path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "inner.txt").write_text("x")
+    (tmp_path / "A.txt").write_text("x")
+    (tmp_path / "c").mkdir()
+    (tmp_path / "c" / "d").mkdir()
+    (tmp_path / "c" / "d" / "deep.txt").write_text("x")
+
+    result = asyncio.run(srv.dir_tree(str(tmp_path), max_depth=2))
+    assert result.splitlines()[1:] == ["- b/", "  - inner.txt", "- c/", "  - d/", "- A.txt"]
+    assert asyncio.run(srv.dir_tree(str(tmp_path), max_depth=5, parallel=True)) == asyncio.run(
+        srv.dir_tree(str(tmp_path), max_depth=5)
+    )
+    limited = asyncio.run(srv.dir_tree(str(tmp_path), max_depth=5, max_entries=2))
+    assert limited.splitlines()[1:] == ["- b/", "  - inner.txt", "…(max_entries reached)…"]
+
+
+def test_dir_usage_counts_hardlinks_once_and_caches(tmp_path: Path):
+    (tmp_path / "big").mkdir()
+    (tmp_path / "big" / "data.bin").write_bytes(b"x" * 1000)
+    os.link(tmp_path / "big" / "data.bin", tmp_path / "big" / "alias.bin")
+    (tmp_path / "small").mkdir()
+    (tmp_path / "small" / "a.txt").write_bytes(b"x" * 10)
+    for d in (tmp_path, tmp_path / "big", tmp_path / "small"):
+        os.utime(d, (1_000_000, 1_000_000))
+
+    result = asyncio.run(srv.dir_usage(str(tmp_path), parallel=False))
+    assert "size_bytes: 1010\n" in result
+    assert "files: 2\ndirs: 2\nhardlinked_files: 1 (counted once)\ncached_dirs: 0" in result
+    assert "largest dirs:\n1000\tbig/\n10\tsmall/" in result
+
+    again = asyncio.run(srv.dir_usage(str(tmp_path)))
+    assert again == result.replace("cached_dirs: 0", "cached_dirs: 3")
+    (tmp_path / "small" / "b.txt").write_bytes(b"x" * 5)
+    assert "size_bytes: 1015\n" in asyncio.run(srv.dir_usage(str(tmp_path)))
+
+    # Growing a file in place leaves its directory's mtime alone.
+    with (tmp_path / "big" / "data.bin").open("ab") as f:
+        f.write(b"x" * 5000)
+    grown = asyncio.run(srv.dir_usage(str(tmp_path)))
+    assert "size_bytes: 6015\n" in grown and "cached_dirs: 2" in grown
+
+
+def test_hash_tree_uses_digest_cache(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    root = tmp_path / "release"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.bin").write_bytes(b"a" * 5_000_000)
+    (root / "sub" / "b.txt").write_bytes(b"b")
+    for f in (root / "a.bin", root / "sub" / "b.txt"):
+        os.utime(f, (1_000_000, 1_000_000))
+
+    first = asyncio.run(srv.hash_tree(str(root)))
+    assert f"{hashlib.sha256(b'a' * 5_000_000).hexdigest()}  a.bin" in first
+    assert f"{hashlib.sha256(b'b').hexdigest()}  {os.path.join('sub', 'b.txt')}" in first
+    assert "cached: 0\nbytes_read: 5000001" in first
+    assert asyncio.run(srv.hash_tree(str(root))) == first.replace("cached: 0\nbytes_read: 5000001", "cached: 2\nbytes_read: 0")
+
+    (root / "sub" / "b.txt").write_bytes(b"c")
+    again = asyncio.run(srv.hash_many([str(root / "sub" / "b.txt"), str(root / "missing")], algorithm="sha256"))
+    assert f"cached: 0\nbytes_read: 1\n\n{hashlib.sha256(b'c').hexdigest()}" in again
+    assert "error: " in again.splitlines()[-1]
+    assert asyncio.run(srv.hash_many([str(root / "a.bin")], algorithm="crc32")).startswith("error: unknown algorithm")
+
+
+def test_hash_tree_sorts_by_relative_path_and_skips_symlinks(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", None)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "z.txt").write_bytes(b"z")
+    (tmp_path / "b.txt").write_bytes(b"b")
+    (tmp_path / "link.txt").symlink_to(tmp_path / "b.txt")
+
+    out = asyncio.run(srv.hash_tree(str(tmp_path)))
+    names = [line.split("  ", 1)[1] for line in out.split("\n\n", 1)[1].splitlines()]
+    assert names == [os.path.join("a", "z.txt"), "b.txt"]
+
+
+def test_digest_cache_is_pruned(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(srv, "_hash_pruned", 0.0)
+    monkeypatch.setattr(srv, "_HASH_MAX_ROWS", 2)
+    files = []
+    for name in "abc":
+        f = tmp_path / f"{name}.txt"
+        f.write_text(name)
+        os.utime(f, (1_000_000, 1_000_000))
+        files.append(str(f))
+    db = srv._hash_db()
+    with db:
+        db.execute("INSERT INTO digests VALUES ('/gone', 'sha256', 1, 1, 1, 'x', 0)")
+    db.close()
+
+    asyncio.run(srv.hash_many(files[:1]))
+    db = srv._hash_db()
+    # The row for a deleted file was unused for too long.
+    assert [r[0] for r in db.execute("SELECT path FROM digests")] == files[:1]
+    with db:
+        db.execute("UPDATE digests SET used = used - 100")
+    db.close()
+
+    monkeypatch.setattr(srv, "_hash_pruned", 0.0)
+    asyncio.run(srv.hash_many(files[1:]))
+    db = srv._hash_db()
+    # Over _HASH_MAX_ROWS, the least recently used digest goes.
+    assert sorted(r[0] for r in db.execute("SELECT path FROM digests")) == files[1:]
+    db.close()
+
+
+def test_file_tail_range_and_lines(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_LINE_BLOCK", 64)
+    monkeypatch.setattr(srv, "_TAIL_BLOCK", 16)
+    p = tmp_path / "app.log"
+    p.write_text("".join(f"line {i}\n" for i in range(1, 101)))
+
+    assert asyncio.run(srv.file_tail(str(p), lines=2)) == "line 99\nline 100"
+    assert asyncio.run(srv.file_lines(str(p), start=50, count=2)) == "50\tline 50\n51\tline 51"
+    assert len(srv._line_indexes[str(p.resolve())].offsets) > 1
+    assert asyncio.run(srv.file_lines(str(p), start=3, count=1)) == "3\tline 3"
+    assert asyncio.run(srv.file_lines(str(p), start=101)) == "(no line 101: file has 100 lines)"
+
+    with p.open("a") as f:
+        f.write("line 101")
+    assert asyncio.run(srv.file_lines(str(p), start=100)) == "100\tline 100\n101\tline 101"
+    assert asyncio.run(srv.file_range(str(p), offset=-8)).endswith("\n\nline 101")
+    assert "00000000  6c 69 6e 65" in asyncio.run(srv.file_range(str(p), offset=0, length=4, hex=True))
+
+
+def test_grep_tree_literal_regex_and_cap(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_GREP_BLOCK", 32)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("import os\n\ndef main():\n    return os.getcwd()  # TODO\n" * 3)
+    (tmp_path / "src" / "blob.bin").write_bytes(b"\0TODO")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "dep.js").write_text("TODO")
+
+    result = asyncio.run(srv.grep_tree(str(tmp_path), "TODO"))
+    app = os.path.join("src", "app.py")
+    assert result.splitlines()[:3] == ["matches: 3", "files_searched: 1", "binary_skipped: 1"]
+    assert f"{app}:8:     return os.getcwd()  # TODO" in result
+
+    result = asyncio.run(srv.grep_tree(str(tmp_path), r"^def \w+", regex=True, include="*.py", max_matches=2))
+    assert result.splitlines()[-3:] == [f"{app}:3: def main():", f"{app}:7: def main():", "…(max_matches reached)…"]
+    assert asyncio.run(srv.grep_tree(str(tmp_path), "(", regex=True)).startswith("error: bad pattern")
+
+
+def test_find_duplicates_stages(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_CACHE_DIR", None)
+    monkeypatch.setattr(srv, "_PARTIAL_BYTES", 4)
+    (tmp_path / "a.bin").write_bytes(b"head-middle-tail")
+    (tmp_path / "b.bin").write_bytes(b"head-middle-tail")
+    (tmp_path / "c.bin").write_bytes(b"head-MIDDLE-tail")  # same size, head and tail
+    (tmp_path / "d.bin").write_bytes(b"HEAD-middle-tail")  # same size only
+    os.link(tmp_path / "a.bin", tmp_path / "a-link.bin")
+    (tmp_path / "x.txt").write_text("small")
+    (tmp_path / "y.txt").write_text("small")
+
+    result = asyncio.run(srv.find_duplicates(str(tmp_path)))
+    assert result.splitlines()[:8] == [
+        "files: 6",
+        "same_size: 6",
+        "same_head_tail: 5",
+        "duplicate_groups: 2",
+        "duplicate_files: 2",
+        "reclaimable_bytes: 21",
+        "bytes_read: 90",
+        "hardlinks_skipped: 1",
+    ]
+    assert result.endswith("16 bytes x 2\n  a-link.bin\n  b.bin\n\n5 bytes x 2\n  x.txt\n  y.txt")
+
+
+def test_file_lines_index_is_not_trusted_after_in_place_changes(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_LINE_BLOCK", 16)
+    p = tmp_path / "a.txt"
+    p.write_text("".join(f"{i:02}\n" for i in range(40)))
+    key = str(p.resolve())
+    assert asyncio.run(srv.file_lines(str(p), start=30, count=1)) == "30\t29"
+
+    # Rewritten within the same mtime tick: same size and mtime, other lines.
+    st = p.stat()
+    p.write_text("".join(f"{i:03}\n" for i in range(30)))
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert asyncio.run(srv.file_lines(str(p), start=30, count=1)) == "30\t029"
+
+    # A stale index that claims more lines than the file has must not spin.
+    index = srv._line_indexes[key]
+    index.end_lines += 100
+    index.lines[-1] += 100
+    assert asyncio.run(srv.file_lines(str(p), start=60)) == "(no line 60: file has 30 lines)"
+
+
+def test_grep_tree_end_anchor_matches_crlf_lines(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_GREP_BLOCK", 8)
+    (tmp_path / "win.txt").write_bytes(b"fix later TODO\r\nTODO: now\r\nlast TODO")
+
+    result = asyncio.run(srv.grep_tree(str(tmp_path), r"TODO$", regex=True))
+    assert result.splitlines()[0] == "matches: 2"
+    assert "win.txt:1: fix later TODO" in result and "win.txt:3: last TODO" in result
+
+
+def test_grep_tree_zero_width_regex_matches_each_line_once(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(srv, "_GREP_BLOCK", 16)
+    (tmp_path / "crlf.txt").write_bytes(b"first\r\nsecond\r\n")
+    (tmp_path / "lf.txt").write_bytes(b"".join(b"line %d\n" % i for i in range(20)) + b"\nend")
+
+    result = asyncio.run(srv.grep_tree(str(tmp_path), "^", regex=True))
+    assert result.splitlines()[0] == "matches: 24"
+    assert "crlf.txt:3:" not in result
+    result = asyncio.run(srv.grep_tree(str(tmp_path), "^$", regex=True))
+    assert result.splitlines()[0] == "matches: 1" and "lf.txt:21: " in result
+    assert "lf.txt:22: end" in asyncio.run(srv.grep_tree(str(tmp_path), "d$", regex=True, include="lf.txt"))
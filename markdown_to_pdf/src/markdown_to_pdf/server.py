@@ -4,11 +4,27 @@ Markdown to PDF MCP Server
 Provides tools to convert Markdown content to PDF files.
 """
 
+import asyncio
+import base64
+import copy
+import hashlib
+import multiprocessing
 import os
+import queue
 import re
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Optional, Union
+from urllib.parse import quote
 from mcp.server.fastmcp import FastMCP
+from mcp.types import BlobResourceContents, EmbeddedResource
 import markdown
 from io import BytesIO
 
@@ -18,9 +34,10 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Preformatted, ListFlowable, ListItem
+    PageBreak, Preformatted, ListFlowable, ListItem, Flowable
 )
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
+from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
 
 # Initialize the MCP server
@@ -29,6 +46,30 @@ mcp = FastMCP("Markdown to PDF")
 # Get the default output directory from environment variable
 DEFAULT_OUTPUT_DIR = os.getenv("MARKDOWN_PDF_OUTPUT_DIR", os.getcwd())
 
+# Largest PDF that render_markdown_to_pdf returns inline (bytes)
+MAX_INLINE_PDF_BYTES = int(os.getenv("MARKDOWN_PDF_MAX_INLINE_BYTES", str(20 * 1024 * 1024)))
+
+# Tables with more data rows than this are laid out page by page
+LARGE_TABLE_ROWS = int(os.getenv("MARKDOWN_PDF_LARGE_TABLE_ROWS", "500"))
+
+# Rows sampled to size the columns of a large table
+LARGE_TABLE_SAMPLE_ROWS = 200
+
+# Maximum number of parsed blocks kept in the block cache
+BLOCK_CACHE_SIZE = int(os.getenv("MARKDOWN_PDF_BLOCK_CACHE_SIZE", "4096"))
+
+# Parsed flowables per Markdown block, keyed by a hash of the block text
+_block_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+# Flowables parsed ahead of the one being laid out when streaming a story
+STORY_WINDOW = 64
+
+# Rendering stages timed by RenderProfile, in pipeline order
+PROFILE_STAGES = ('split', 'parse', 'inline', 'clone', 'build')
+
+# Profile that process_inline_formatting reports to while a story is parsed
+_inline_profile = None
+
 
 def create_styles():
     """Create custom paragraph styles for PDF."""
@@ -137,6 +178,92 @@ def create_styles():
     return styles
 
 
+# Read-only style registry shared by every conversion
+STYLES = MappingProxyType(dict(create_styles().byName))
+
+# Horizontal cell padding used by markdown tables
+TABLE_CELL_PADDING = 12
+
+# Narrowest column a large table gives a column: its padding plus room for a few characters
+TABLE_MIN_COLUMN_WIDTH = 2 * TABLE_CELL_PADDING + 20
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f6f8fa')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#333333')),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#dddddd')),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ('LEFTPADDING', (0, 0), (-1, -1), TABLE_CELL_PADDING),
+    ('RIGHTPADDING', (0, 0), (-1, -1), TABLE_CELL_PADDING),
+])
+
+# Large tables keep cells that fit on one line as plain strings. They are set
+# like the CustomBody paragraphs used for every other table cell.
+CHUNKED_TABLE_STYLE = TableStyle(TABLE_STYLE.getCommands() + [
+    ('FONTNAME', (0, 1), (-1, -1), STYLES['CustomBody'].fontName),
+    ('FONTSIZE', (0, 1), (-1, -1), STYLES['CustomBody'].fontSize),
+    ('LEADING', (0, 1), (-1, -1), STYLES['CustomBody'].leading),
+    ('TEXTCOLOR', (0, 1), (-1, -1), STYLES['CustomBody'].textColor),
+])
+
+# Block-level line patterns, tried in order of precedence by classify_line()
+_LINE_RE = re.compile(
+    r'(?P<fence>\s*```)'
+    r'|(?P<header>(?P<header_level>#{1,6})\s+(?P<header_text>.+)$)'
+    r'|(?P<hr>\s*(-{3,}|\*{3,}|_{3,})\s*$)'
+    r'|(?P<bullet>\s*[-*+]\s+(?P<bullet_text>.+)$)'
+    r'|(?P<number>\s*\d+\.\s+(?P<number_text>.+)$)'
+    r'|(?P<blockquote>>\s*(?P<blockquote_text>.*)$)'
+    r'|(?P<table>\s*\|)'
+)
+
+# Lines that end a paragraph, matched against the stripped line
+_SPECIAL_LINE_RE = re.compile(r'#{1,6}\s|[-*+]\s|\d+\.\s|>|```|\||(-{3,}|\*{3,}|_{3,})$')
+
+_BLOCKQUOTE_RE = re.compile(r'>\s*(.*)$')
+
+# Inline span content: code spans are atomic, so emphasis never ends inside one
+_INLINE_CONTENT = r'(?:[^`]|`[^`]+`|`(?![^`]+`))+?'
+
+# Link text holds no brackets and URLs are bounded, so a '[' that does not
+# start a link is rejected at the next bracket instead of rescanning the rest
+# of the line (which made long runs of '[' quadratic or worse).
+_LINK_TEXT = r'(?:[^`\[\]]|`[^`]+`|`(?![^`]+`))+?'
+_MAX_LINK_URL = 2048
+
+# All inline constructs, tried leftmost first and then in order of precedence.
+# An underscore only opens italics when it does not follow a letter or digit.
+_INLINE_RE = re.compile(
+    r'`(?P<code>[^`]+)`'
+    rf'|\*\*(?P<bold>{_INLINE_CONTENT})\*\*'
+    rf'|__(?P<bold_u>{_INLINE_CONTENT})__'
+    rf'|\*(?P<italic>{_INLINE_CONTENT})\*'
+    rf'|_(?<![^\W_]_)(?P<italic_u>{_INLINE_CONTENT})_'
+    rf'|\[(?P<link_text>{_LINK_TEXT})\]\((?P<link_url>[^)]{{1,{_MAX_LINK_URL}}})\)'
+    rf'|~~(?P<strike>{_INLINE_CONTENT})~~'
+)
+
+# Characters that can start an inline construct
+_INLINE_MARKUP_RE = re.compile(r'[`*_\[~]')
+
+_INLINE_TAGS = {
+    'code': ('<font name="Courier" backColor="#f6f8fa">', '</font>'),
+    'bold': ('<b>', '</b>'),
+    'bold_u': ('<b>', '</b>'),
+    'italic': ('<i>', '</i>'),
+    'italic_u': ('<i>', '</i>'),
+    'strike': ('<strike>', '</strike>'),
+}
+
+
 def escape_html(text):
     """Escape HTML/XML special characters for reportlab."""
     text = text.replace('&', '&amp;')
@@ -145,12 +272,207 @@ def escape_html(text):
     return text
 
 
-def markdown_to_reportlab(markdown_text):
-    """Convert markdown text to reportlab elements."""
-    styles = create_styles()
+def split_markdown_blocks(markdown_text):
+    """Split markdown text into blank-line separated blocks.
+
+    Blank lines are returned as empty strings so that the caller can keep the
+    spacing between blocks. Fenced code blocks are never split, even when they
+    contain blank lines.
+    """
+    blocks = []
+    current = []
+    in_code_block = False
+
+    for line in markdown_text.split('\n'):
+        if line.strip().startswith('```'):
+            in_code_block = not in_code_block
+        elif not in_code_block and not line.strip():
+            if current:
+                blocks.append('\n'.join(current))
+                current = []
+            blocks.append('')
+            continue
+        current.append(line)
+
+    if current:
+        blocks.append('\n'.join(current))
+
+    return blocks
+
+
+def clone_flowable(flowable):
+    """Return a fresh, not yet laid out copy of a cached flowable.
+
+    Parsed paragraph fragments and styles are shared, so cloning never parses
+    markup again. Containers get their own children so that layout state from
+    one build never leaks into another.
+    """
+    if isinstance(flowable, Paragraph):
+        return Paragraph(flowable.text, flowable.style, flowable.bulletText, frags=flowable.frags)
+
+    clone = copy.copy(flowable)
+    if isinstance(flowable, (ListFlowable, ListItem)):
+        clone._flowables = [clone_flowable(child) for child in flowable._flowables]
+    elif isinstance(flowable, Table):
+        clone._cellvalues = [
+            [clone_flowable(cell) if isinstance(cell, Flowable) else cell for cell in row]
+            for row in flowable._cellvalues
+        ]
+    return clone
+
+
+def clear_block_cache():
+    """Drop all cached block flowables."""
+    _block_cache.clear()
+
+
+@dataclass
+class RenderProfile:
+    """Per-stage timings (seconds) and element counts for one rendering."""
+
+    timings: dict = field(default_factory=lambda: dict.fromkeys(PROFILE_STAGES, 0.0))
+    blocks: int = 0
+    cached_blocks: int = 0
+    flowables: Counter = field(default_factory=Counter)
+    pages: int = 0
+    _nested: list = field(default_factory=list, repr=False)
+
+    @contextmanager
+    def stage(self, name):
+        """Add the time spent in the with-block to stage ``name``.
+
+        Stages nest: time spent in an inner stage (inline formatting within
+        parsing, parsing within a streamed doc.build) only counts for the
+        inner one.
+        """
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] += elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def report(self) -> str:
+        """Format the profile as a short plain-text report."""
+        lines = ["Profile:"]
+        lines.extend(f"  {name:<7}{self.timings[name] * 1e3:>10.1f} ms" for name in PROFILE_STAGES)
+        lines.append(f"  {'total':<7}{sum(self.timings.values()) * 1e3:>10.1f} ms")
+        lines.append(f"Blocks: {self.blocks} ({self.cached_blocks} from cache)")
+        counts = ", ".join(f"{name} {count}" for name, count in self.flowables.most_common())
+        lines.append(f"Flowables: {counts or 'none'}")
+        lines.append(f"Pages: {self.pages}")
+        return "\n".join(lines)
+
+
+def _unprofiled(name):
+    return nullcontext()
+
+
+def markdown_to_reportlab(markdown_text, profile=None):
+    """Convert markdown text to a list of reportlab elements.
+
+    See iter_story; this builds the whole story at once.
+    """
+    return list(iter_story(markdown_text, profile))
+
+
+def iter_story(markdown_text, profile=None):
+    """Yield the reportlab elements for markdown text, parsing blocks lazily.
+
+    Each block is parsed only once: its flowables are cached by content hash,
+    so re-rendering a document after a small edit only parses the blocks that
+    changed. Pass a RenderProfile to collect stage timings and counts.
+    """
+    global _inline_profile
+    stage = profile.stage if profile is not None else _unprofiled
+
+    with stage('split'):
+        blocks = split_markdown_blocks(markdown_text)
+    if profile is not None:
+        profile.blocks = sum(1 for block in blocks if block)
+
+    for block in blocks:
+        if not block:
+            flowables = (Spacer(1, 0.1*inch),)
+        else:
+            key = hashlib.sha1(block.encode('utf-8', 'surrogatepass')).digest()
+            templates = _block_cache.get(key)
+            if templates is None:
+                _inline_profile = profile
+                try:
+                    with stage('parse'):
+                        templates = tuple(parse_markdown_block(block.split('\n'), STYLES))
+                finally:
+                    _inline_profile = None
+                _block_cache[key] = templates
+                if len(_block_cache) > BLOCK_CACHE_SIZE:
+                    _block_cache.popitem(last=False)
+            else:
+                _block_cache.move_to_end(key)
+                if profile is not None:
+                    profile.cached_blocks += 1
+
+            # Cached flowables are templates: only their clones are ever laid out
+            with stage('clone'):
+                flowables = [clone_flowable(template) for template in templates]
+
+        for flowable in flowables:
+            if profile is not None:
+                profile.flowables[type(flowable).__name__] += 1
+            yield flowable
+
+
+class StreamingStory:
+    """List-like story for doc.build() that pulls flowables from an iterator.
+
+    doc.build() only looks at the front of its story: it removes flowables
+    as they are laid out and pushes split remainders back. Buffering a small
+    window from the iterator is therefore enough, and flowables already drawn
+    can be garbage collected, so memory no longer grows with the document.
+    """
+
+    def __init__(self, flowables, window=STORY_WINDOW):
+        self._source = iter(flowables)
+        self._buffer = []
+        self._window = window
+
+    def _fill(self, size):
+        while self._source is not None and len(self._buffer) < size:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        # doc.build() uses the length to test for the end of the story and to
+        # bound keepWithNext look-ahead, so the buffered window is enough
+        self._fill(self._window)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(self._window if index.stop is None else index.stop)
+        else:
+            self._fill(index + 1)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        del self._buffer[index]
+
+    def insert(self, index, flowable):
+        self._buffer.insert(index, flowable)
+
+
+def parse_markdown_block(lines, styles):
+    """Convert the lines of a single markdown block to reportlab elements."""
     story = []
 
-    lines = markdown_text.split('\n')
     i = 0
     in_code_block = False
     code_block_lines = []
@@ -160,9 +482,10 @@ def markdown_to_reportlab(markdown_text):
 
     while i < len(lines):
         line = lines[i]
+        kind, match = classify_line(line)
 
         # Handle code blocks
-        if line.strip().startswith('```'):
+        if kind == 'fence':
             if in_code_block:
                 # End of code block
                 code_text = '\n'.join(code_block_lines)
@@ -182,15 +505,14 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle headers
-        header_match = re.match(r'^(#{1,6})\s+(.+)$', line)
-        if header_match:
+        if kind == 'header':
             if in_list:
                 story.append(create_list(list_items, list_type, styles))
                 list_items = []
                 in_list = False
 
-            level = len(header_match.group(1))
-            text = header_match.group(2)
+            level = len(match.group('header_level'))
+            text = match.group('header_text')
             text = process_inline_formatting(text)
             style_name = f'CustomH{level}'
             story.append(Paragraph(text, styles[style_name]))
@@ -198,7 +520,7 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle horizontal rules
-        if re.match(r'^(-{3,}|\*{3,}|_{3,})$', line.strip()):
+        if kind == 'hr':
             if in_list:
                 story.append(create_list(list_items, list_type, styles))
                 list_items = []
@@ -214,10 +536,8 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle unordered lists
-        list_match = re.match(r'^(\s*)[-*+]\s+(.+)$', line)
-        if list_match:
-            indent = len(list_match.group(1))
-            text = list_match.group(2)
+        if kind == 'bullet':
+            text = match.group('bullet_text')
             text = process_inline_formatting(text)
 
             if not in_list or list_type != 'bullet':
@@ -232,10 +552,8 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle ordered lists
-        ordered_list_match = re.match(r'^(\s*)(\d+)\.\s+(.+)$', line)
-        if ordered_list_match:
-            indent = len(ordered_list_match.group(1))
-            text = ordered_list_match.group(3)
+        if kind == 'number':
+            text = match.group('number_text')
             text = process_inline_formatting(text)
 
             if not in_list or list_type != 'number':
@@ -250,19 +568,18 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle blockquotes
-        blockquote_match = re.match(r'^>\s*(.*)$', line)
-        if blockquote_match:
+        if kind == 'blockquote':
             if in_list:
                 story.append(create_list(list_items, list_type, styles))
                 list_items = []
                 in_list = False
 
-            text = blockquote_match.group(1)
+            text = match.group('blockquote_text')
             # Collect multi-line blockquotes
             blockquote_lines = [text]
             i += 1
-            while i < len(lines) and re.match(r'^>\s*(.*)$', lines[i]):
-                blockquote_lines.append(re.match(r'^>\s*(.*)$', lines[i]).group(1))
+            while i < len(lines) and (quote_match := _BLOCKQUOTE_RE.match(lines[i])):
+                blockquote_lines.append(quote_match.group(1))
                 i += 1
 
             blockquote_text = ' '.join(blockquote_lines)
@@ -271,7 +588,7 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle tables (simple markdown tables)
-        if '|' in line and line.strip().startswith('|'):
+        if kind == 'table':
             if in_list:
                 story.append(create_list(list_items, list_type, styles))
                 list_items = []
@@ -289,7 +606,7 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle empty lines
-        if not line.strip():
+        if kind == 'blank':
             if in_list:
                 story.append(create_list(list_items, list_type, styles))
                 list_items = []
@@ -299,7 +616,7 @@ def markdown_to_reportlab(markdown_text):
             continue
 
         # Handle regular paragraphs
-        if line.strip():
+        if kind == 'text':
             if in_list:
                 story.append(create_list(list_items, list_type, styles))
                 list_items = []
@@ -326,33 +643,26 @@ def markdown_to_reportlab(markdown_text):
     return story
 
 
+def classify_line(line):
+    """Classify a markdown line in a single regex pass.
+
+    Returns a ``(kind, match)`` tuple. ``kind`` is one of 'fence', 'header',
+    'hr', 'bullet', 'number', 'blockquote', 'table', 'blank' or 'text';
+    ``match`` is None for the last two.
+    """
+    match = _LINE_RE.match(line)
+    if match:
+        return match.lastgroup, match
+    return ('text' if line.strip() else 'blank'), None
+
+
 def is_special_line(line):
     """Check if a line is a special markdown element."""
-    special_patterns = [
-        r'^#{1,6}\s+',  # Headers
-        r'^[-*+]\s+',   # Unordered list
-        r'^\d+\.\s+',   # Ordered list
-        r'^>\s*',       # Blockquote
-        r'^```',        # Code block
-        r'^\|',         # Table
-        r'^(-{3,}|\*{3,}|_{3,})$',  # Horizontal rule
-    ]
-    return any(re.match(pattern, line.strip()) for pattern in special_patterns)
+    return _SPECIAL_LINE_RE.match(line.strip()) is not None
 
 
 def create_list(items, list_type, styles):
     """Create a list flowable from list items."""
-    from reportlab.lib.styles import ParagraphStyle
-    from reportlab.lib.enums import TA_LEFT
-
-    # Create a custom bullet style with left indent
-    bullet_style = ParagraphStyle(
-        'BulletStyle',
-        parent=styles['CustomBody'],
-        leftIndent=20,
-        bulletIndent=10
-    )
-
     list_items = []
 
     if list_type == 'bullet':
@@ -383,55 +693,49 @@ def create_list(items, list_type, styles):
 
 def process_inline_formatting(text):
     """Process inline markdown formatting (bold, italic, code, links)."""
-    # Escape HTML first
-    text = escape_html(text)
+    if _inline_profile is None:
+        return _format_inline(escape_html(text))
+    with _inline_profile.stage('inline'):
+        return _format_inline(escape_html(text))
 
-    # Extract inline code segments so that other formatting doesn't affect them
-    code_spans: list[str] = []
 
-    def _store_code(match: re.Match[str]) -> str:
-        code_spans.append(match.group(1))
-        return f"{{{{CODE_{len(code_spans) - 1}}}}}"
+def _format_inline(text):
+    """Convert escaped inline markdown to reportlab markup in a single scan."""
+    out = []
+    pos = 0
+    search = _INLINE_RE.search
 
-    text = re.sub(r'`([^`]+)`', _store_code, text)
-
-    # Bold and italic: **text** or __text__
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
-
-    # Italic: *text*
-    text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', text)
-
-    # Italic: _text_ (but ignore underscores inside identifiers/URLs)
-    def _italicize_underscore(match: re.Match[str]) -> str:
+    while (match := search(text, pos)) is not None:
         start, end = match.span()
-        prev_char = match.string[start - 1] if start > 0 else ''
-        next_char = match.string[end] if end < len(match.string) else ''
-
-        if prev_char and prev_char.isalnum():
-            return match.group(0)
-        if next_char and next_char.isalnum():
-            return match.group(0)
+        kind = match.lastgroup
 
-        return f"<i>{match.group(1)}</i>"
+        # Underscores glued to a following letter are part of an identifier
+        if kind == 'italic_u' and text[end:end + 1].isalnum():
+            out.append(text[pos:start + 1])
+            pos = start + 1
+            continue
 
-    text = re.sub(r'_(.+?)_', _italicize_underscore, text)
+        out.append(text[pos:start])
+        pos = end
 
-    # Links: [text](url)
-    text = re.sub(r'\[(.+?)\]\((.+?)\)', r'<link href="\2" color="blue"><u>\1</u></link>', text)
+        if kind == 'link_url':
+            inner = match.group('link_text')
+            open_tag = f'<link href="{match.group("link_url")}" color="blue"><u>'
+            close_tag = '</u></link>'
+        else:
+            inner = match.group(kind)
+            open_tag, close_tag = _INLINE_TAGS[kind]
 
-    # Strikethrough: ~~text~~
-    text = re.sub(r'~~(.+?)~~', r'<strike>\1</strike>', text)
+        # Code spans are verbatim; everything else may contain nested markup
+        if kind != 'code' and _INLINE_MARKUP_RE.search(inner):
+            inner = _format_inline(inner)
 
-    # Restore inline code segments
-    for index, code in enumerate(code_spans):
-        placeholder = f"{{{{CODE_{index}}}}}"
-        text = text.replace(
-            placeholder,
-            f'<font name="Courier" backColor="#f6f8fa">{code}</font>',
-        )
+        out.append(open_tag)
+        out.append(inner)
+        out.append(close_tag)
 
-    return text
+    out.append(text[pos:])
+    return ''.join(out)
 
 
 def parse_markdown_table(table_lines, styles):
@@ -446,57 +750,247 @@ def parse_markdown_table(table_lines, styles):
     if len(table_lines) < 3:
         return None
 
-    # Parse data rows - wrap all cells in Paragraph objects
-    data = []
-
-    # Process header row
-    header_row = []
-    for cell in header_cells:
-        cell_text = escape_html(cell)
-        header_row.append(Paragraph(cell_text, styles['CustomBody']))
-    data.append(header_row)
-
-    # Process data rows
+    data_rows = []
     for line in table_lines[2:]:
         cells = [cell.strip() for cell in line.split('|')[1:-1]]
         if cells:
-            row = []
-            for cell in cells:
-                cell_text = escape_html(cell)
-                row.append(Paragraph(cell_text, styles['CustomBody']))
-            data.append(row)
+            data_rows.append(cells)
 
-    if not data:
-        return None
+    if len(data_rows) > LARGE_TABLE_ROWS:
+        # Same number of cells in every row, as the chunked layout expects
+        width = len(header_cells)
+        data_rows = [(row + [''] * width)[:width] for row in data_rows]
+        return ChunkedTable(header_cells, data_rows, styles)
+
+    # Wrap all cells in Paragraph objects
+    data = []
+    for row_cells in [header_cells] + data_rows:
+        row = []
+        for cell in row_cells:
+            cell_text = escape_html(cell)
+            row.append(Paragraph(cell_text, styles['CustomBody']))
+        data.append(row)
 
     # Create table
-    table = Table(data, repeatRows=1)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f6f8fa')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#333333')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#dddddd')),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-    ]))
-
-    return table
+    return Table(data, repeatRows=1, style=TABLE_STYLE)
+
+
+class ChunkedTable(Flowable):
+    """A large markdown table laid out one page-sized Table at a time.
+
+    A single Table re-measures all of its remaining rows at every page break,
+    which makes long tables quadratic. Here column widths are computed once
+    from a sample of rows, cells that fit on one line are plain strings, and
+    each page only measures the rows that can fit on it.
+    """
+
+    def __init__(self, header, rows, styles, start=0, natural_widths=None):
+        Flowable.__init__(self)
+        self.header = header
+        self.rows = rows
+        self.styles = styles
+        self.start = start
+        self.natural_widths = natural_widths or self._measure_columns()
+        self._table = None
+
+    def _measure_columns(self):
+        """Natural column widths from the header and a sample of rows."""
+        sample = self.rows[:LARGE_TABLE_SAMPLE_ROWS]
+        widths = []
+        for col, title in enumerate(self.header):
+            width = pdfmetrics.stringWidth(title, 'Helvetica', 11)
+            for row in sample:
+                width = max(width, pdfmetrics.stringWidth(row[col], 'Helvetica', 11))
+            widths.append(width + 2 * TABLE_CELL_PADDING)
+        return widths
+
+    def _column_widths(self, avail_width):
+        """Fit the natural widths into avail_width, shrinking only the widest columns.
+
+        Columns narrower than a common cap keep their natural width and the
+        wider ones are cut to the cap, so one long text column cannot squeeze
+        the others below their padding. No column gets less than
+        TABLE_MIN_COLUMN_WIDTH unless even that does not fit.
+        """
+        widths = [max(width, TABLE_MIN_COLUMN_WIDTH) for width in self.natural_widths]
+        if sum(widths) <= avail_width:
+            return widths
+
+        cap = avail_width / len(widths)
+        remaining = avail_width
+        ordered = sorted(widths)
+        for i, width in enumerate(ordered):
+            if width * (len(ordered) - i) > remaining:
+                cap = remaining / (len(ordered) - i)
+                break
+            remaining -= width
+        # Round down so that the columns never add up to more than the frame
+        return [int(min(width, cap) * 100) / 100 for width in widths]
+
+    def _rows_that_may_fit(self, avail_height):
+        return int(avail_height // _min_table_row_height()) + 1
+
+    def _page_table(self, end, avail_width):
+        """Build a Table for rows[start:end] with the header repeated on top."""
+        col_widths = self._column_widths(avail_width)
+        body_style = self.styles['CustomBody']
+
+        data = [[Paragraph(escape_html(title), body_style) for title in self.header]]
+        for row in self.rows[self.start:end]:
+            data.append([
+                cell
+                if pdfmetrics.stringWidth(cell, 'Helvetica', 11) <= width - 2 * TABLE_CELL_PADDING
+                else Paragraph(escape_html(cell), body_style)
+                for cell, width in zip(row, col_widths)
+            ])
+
+        table = Table(data, colWidths=col_widths, repeatRows=1, style=CHUNKED_TABLE_STYLE)
+        if self.start % 2:
+            # Keep the row stripes continuous across pages
+            table.setStyle([('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#f9f9f9'), colors.white])])
+        return table
+
+    def wrap(self, availWidth, availHeight):
+        remaining = len(self.rows) - self.start
+        if remaining <= self._rows_that_may_fit(availHeight):
+            self._table = self._page_table(len(self.rows), availWidth)
+            return self._table.wrap(availWidth, availHeight)
+
+        # Cannot fit: report a lower bound on the height so that we get split
+        self._table = None
+        return availWidth, remaining * _min_table_row_height()
+
+    def split(self, availWidth, availHeight):
+        end = min(len(self.rows), self.start + self._rows_that_may_fit(availHeight))
+        parts = self._page_table(end, availWidth).split(availWidth, availHeight)
+        if not parts:
+            return []
+
+        taken = len(parts[0]._cellvalues) - 1
+        if self.start + taken >= len(self.rows):
+            return [parts[0]]
+        rest = ChunkedTable(self.header, self.rows, self.styles, self.start + taken, self.natural_widths)
+        return [parts[0], rest]
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._table.drawOn(canvas, x, y, _sW)
+
+
+_table_row_height = None
+
+
+def _min_table_row_height():
+    """Height of the shortest possible body row of a markdown table."""
+    global _table_row_height
+    if _table_row_height is None:
+        body = STYLES['CustomBody']
+        table = Table([['x', 'x'], ['x', Paragraph('x', body)]], style=CHUNKED_TABLE_STYLE)
+        table.wrap(A4[0], A4[1])
+        plain = Table([['x'], ['x']], style=CHUNKED_TABLE_STYLE)
+        plain.wrap(A4[0], A4[1])
+        _table_row_height = min(table._rowHeights[1], plain._rowHeights[1])
+    return _table_row_height
+
+
+def resolve_output_path(filename):
+    """Validate an output filename and return its full path.
+
+    The output directory is created if needed. Raises ValueError with a
+    user-facing message when the filename or directory is unusable.
+    """
+    if not isinstance(filename, str):
+        raise ValueError(f"filename must be a string, got {type(filename).__name__}")
+
+    # Validate and create output directory if it doesn't exist
+    output_path = Path(DEFAULT_OUTPUT_DIR)
+    if not output_path.exists():
+        output_path.mkdir(parents=True, exist_ok=True)
+
+    if not output_path.is_dir():
+        raise ValueError(f"Output path '{DEFAULT_OUTPUT_DIR}' exists but is not a directory")
+
+    # Ensure filename has .pdf extension
+    if not filename.endswith('.pdf'):
+        filename = f"{filename}.pdf"
+
+    # Validate filename (basic sanitization)
+    if any(char in filename for char in ['/', '\\', '\0']):
+        raise ValueError("Invalid filename. Filename cannot contain path separators")
+
+    return output_path / filename
+
+
+def build_pdf(markdown_content, output, on_page=None, profile=None):
+    """Render markdown content as a PDF into output.
+
+    ``output`` is a file path or a writable binary file object. ``on_page`` is
+    called with the page number after each page is drawn. A RenderProfile
+    passed as ``profile`` is filled in. Returns an error message, or None on
+    success.
+    """
+    # Markdown is converted to reportlab elements as doc.build() lays them out
+    story = StreamingStory(iter_story(markdown_content, profile))
+
+    # Create PDF
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=2.5*cm,
+        leftMargin=2.5*cm,
+        topMargin=2.5*cm,
+        bottomMargin=2.5*cm
+    )
+
+    if on_page is not None:
+        # 'PAGE' is reported as each page is finished, with its page number
+        def report_page(kind, value):
+            if kind == 'PAGE':
+                on_page(value)
+        doc.setProgressCallBack(report_page)
+
+    stage = profile.stage if profile is not None else _unprofiled
+    try:
+        with stage('build'):
+            doc.build(story)
+    except AttributeError as e:
+        if 'decode' in str(e):
+            return f"Error: Type mismatch during PDF generation. {str(e)}. One of the story elements has an unexpected type."
+        raise
+
+    if profile is not None:
+        profile.pages = doc.page
+    return None
+
+
+def write_pdf(markdown_content, full_path, on_page=None, profile=None):
+    """Render markdown content to a PDF at full_path and return the result message.
+
+    When a RenderProfile is given, its report is appended to the message.
+    """
+    error = build_pdf(markdown_content, str(full_path), on_page=on_page, profile=profile)
+    if error:
+        return error
+    message = f"Success: PDF saved to {full_path}"
+    if profile is not None:
+        message += "\n\n" + profile.report()
+    return message
+
+
+def describe_error(error, target_dir):
+    """Turn an unexpected conversion exception into a tool error message."""
+    if isinstance(error, PermissionError):
+        return f"Error: Permission denied when writing to '{target_dir}': {str(error)}"
+    if isinstance(error, OSError):
+        return f"Error: OS error occurred: {str(error)}"
+    return f"Error: Failed to convert Markdown to PDF: {str(error)}"
 
 
 @mcp.tool()
 def save_markdown_to_pdf(
     markdown_content: str,
     filename: str,
-    css_styles: Optional[str] = None
+    css_styles: Optional[str] = None,
+    profile: bool = False
 ) -> str:
     """
     Convert Markdown content to a PDF file and save it to disk.
@@ -506,6 +1000,8 @@ def save_markdown_to_pdf(
         filename: Name of the output PDF file (e.g., "document.pdf")
         css_styles: Optional CSS styles (Note: CSS is not fully supported with reportlab,
                    but basic styling is built-in)
+        profile: Append per-stage timings (split, parse, inline formatting,
+                 flowable cloning, doc.build) and element counts to the result
 
     Returns:
         Success message with the full path to the saved PDF, or error message
@@ -516,69 +1012,404 @@ def save_markdown_to_pdf(
             filename="test.pdf"
         )
     """
+    target_dir = DEFAULT_OUTPUT_DIR
     try:
         # Validate input type
         if not isinstance(markdown_content, str):
             return f"Error: markdown_content must be a string, got {type(markdown_content).__name__}"
 
-        if not isinstance(filename, str):
-            return f"Error: filename must be a string, got {type(filename).__name__}"
+        try:
+            full_path = resolve_output_path(filename)
+        except ValueError as e:
+            return f"Error: {e}"
 
-        # Determine output directory
-        target_dir = DEFAULT_OUTPUT_DIR
+        return write_pdf(markdown_content, full_path, profile=RenderProfile() if profile else None)
 
-        # Validate and create output directory if it doesn't exist
-        output_path = Path(target_dir)
-        if not output_path.exists():
-            output_path.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        return describe_error(e, target_dir)
 
-        if not output_path.is_dir():
-            return f"Error: Output path '{target_dir}' exists but is not a directory"
 
-        # Ensure filename has .pdf extension
+@mcp.tool(structured_output=False)
+def render_markdown_to_pdf(
+    markdown_content: str,
+    filename: str = "document.pdf",
+    as_resource: bool = False,
+    max_bytes: int = 5 * 1024 * 1024,
+) -> Union[str, EmbeddedResource]:
+    """
+    Convert Markdown content to a PDF in memory and return it, without touching disk.
+
+    Args:
+        markdown_content: The Markdown text to convert to PDF
+        filename: Name used for the returned resource (e.g., "document.pdf")
+        as_resource: Return an embedded PDF blob resource instead of base64 text
+        max_bytes: Refuse to return PDFs larger than this (capped by the
+                   MARKDOWN_PDF_MAX_INLINE_BYTES environment variable)
+
+    Returns:
+        The base64-encoded PDF (or a blob resource when as_resource is set),
+        or an error message
+    """
+    try:
+        # Validate input type
+        if not isinstance(markdown_content, str):
+            return f"Error: markdown_content must be a string, got {type(markdown_content).__name__}"
+
+        limit = max(1, min(int(max_bytes), MAX_INLINE_PDF_BYTES))
         if not filename.endswith('.pdf'):
             filename = f"{filename}.pdf"
 
-        # Validate filename (basic sanitization)
-        if any(char in filename for char in ['/', '\\', '\0']):
-            return "Error: Invalid filename. Filename cannot contain path separators"
+        buffer = BytesIO()
+        error = build_pdf(markdown_content, buffer)
+        if error:
+            return error
+
+        size = buffer.getbuffer().nbytes
+        if size > limit:
+            return (
+                f"Error: PDF is {size} bytes, more than max_bytes ({limit}). "
+                "Use save_markdown_to_pdf or submit_pdf_job to write it to disk instead."
+            )
+
+        encoded = base64.b64encode(buffer.getbuffer()).decode('ascii')
+        if not as_resource:
+            return encoded
+
+        return EmbeddedResource(
+            type="resource",
+            resource=BlobResourceContents(
+                uri=f"memory://markdown-to-pdf/{quote(filename)}",
+                mimeType="application/pdf",
+                blob=encoded,
+            ),
+        )
+
+    except Exception as e:
+        return f"Error: Failed to convert Markdown to PDF: {str(e)}"
+
+
+# Background rendering jobs
+# -------------------------
+#
+# Large documents can take tens of seconds in doc.build(). Jobs render in a
+# pool of worker processes so the server stays responsive and several
+# documents can be laid out in parallel. Workers report page progress back
+# through a shared queue.
+
+# Number of worker processes (defaults to the CPU count)
+PDF_WORKERS = int(os.getenv("MARKDOWN_PDF_WORKERS", "0")) or os.cpu_count() or 1
+
+# Finished jobs kept around for job_status/job_result
+MAX_FINISHED_JOBS = 100
+
 
-        # Full output path
-        full_path = output_path / filename
+@dataclass
+class PdfJob:
+    """A background PDF conversion."""
 
-        # Convert Markdown to reportlab elements
+    job_id: str
+    path: Path
+    future: Future
+    submitted_at: float
+    pages_rendered: int = 0
+    finished_at: Optional[float] = None
+
+    @property
+    def result(self) -> str:
+        """Result message of a finished job."""
+        if self.future.cancelled():
+            return "Error: job was cancelled"
+        error = self.future.exception()
+        if error is not None:
+            # The worker itself died (e.g. BrokenProcessPool)
+            return describe_error(error, self.path.parent)
+        return self.future.result()
+
+    @property
+    def status(self) -> str:
+        if self.future.done():
+            return "failed" if self.result.startswith("Error") else "done"
+        if self.pages_rendered or self.future.running():
+            return "running"
+        return "queued"
+
+
+_jobs: "OrderedDict[str, PdfJob]" = OrderedDict()
+_executor: Optional[ProcessPoolExecutor] = None
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    """Process pool initializer: remember the progress queue and load fonts."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+    # Font metrics are cached per process, so every later document reuses them
+    for style in STYLES.values():
+        if isinstance(style, ParagraphStyle):
+            pdfmetrics.getFont(style.fontName)
+
+
+def _run_pdf_job(job_id, markdown_content, full_path):
+    """Render one job inside a worker process."""
+    def on_page(page):
+        _progress_queue.put((job_id, page))
+
+    try:
+        return write_pdf(markdown_content, full_path, on_page=on_page)
+    except Exception as e:
+        return describe_error(e, full_path.parent)
+
+
+def _convert_files(pairs):
+    """Convert (source, target) file pairs inside a worker process.
+
+    Failures are recorded per file so that one bad document never aborts the
+    rest. Returns (source, message, seconds) tuples.
+    """
+    results = []
+    for source, target in pairs:
+        started = time.perf_counter()
         try:
-            story = markdown_to_reportlab(markdown_content)
-        except AttributeError as e:
-            if 'decode' in str(e):
-                return f"Error: Type mismatch during markdown parsing. {str(e)}. Check that markdown_content is properly formatted text."
-            raise
-
-        # Create PDF
-        doc = SimpleDocTemplate(
-            str(full_path),
-            pagesize=A4,
-            rightMargin=2.5*cm,
-            leftMargin=2.5*cm,
-            topMargin=2.5*cm,
-            bottomMargin=2.5*cm
+            markdown_content = Path(source).read_text(encoding='utf-8')
+            message = write_pdf(markdown_content, target)
+        except UnicodeDecodeError as e:
+            message = f"Error: {source} is not valid UTF-8 text: {str(e)}"
+        except Exception as e:
+            message = describe_error(e, target.parent)
+        results.append((source, message, time.perf_counter() - started))
+    return results
+
+
+def _get_executor():
+    """Start the worker pool on first use."""
+    global _executor, _progress_queue
+    if _executor is None:
+        # spawn keeps workers independent of the server's threads and event loop
+        context = multiprocessing.get_context("spawn")
+        _progress_queue = context.Queue()
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(_progress_queue,),
         )
+    return _executor
+
+
+def _discard_executor():
+    """Drop a broken worker pool so that the next submission starts a new one."""
+    global _executor, _progress_queue
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _progress_queue = None
+
+
+def _submit(fn, *args):
+    """Submit work to the pool, replacing it if a dead worker has broken it.
+
+    Once a worker process dies, ProcessPoolExecutor refuses every further
+    submission, so without this one crash would fail all later jobs.
+    """
+    try:
+        return _get_executor().submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_executor()
+        return _get_executor().submit(fn, *args)
+
+
+def _update_jobs():
+    """Apply queued page progress and drop the oldest finished jobs."""
+    if _progress_queue is not None:
+        while True:
+            try:
+                job_id, page = _progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            job = _jobs.get(job_id)
+            if job is not None:
+                job.pages_rendered = max(job.pages_rendered, page)
+
+    finished = [job for job in _jobs.values() if job.future.done()]
+    for job in finished:
+        if job.finished_at is None:
+            job.finished_at = time.time()
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job.job_id]
+
+
+def _format_job(job):
+    elapsed = (job.finished_at or time.time()) - job.submitted_at
+    return "\n".join([
+        f"job_id: {job.job_id}",
+        f"status: {job.status}",
+        f"pages_rendered: {job.pages_rendered}",
+        f"elapsed_s: {elapsed:.2f}",
+        f"path: {job.path}",
+    ])
+
+
+@mcp.tool()
+def submit_pdf_job(markdown_content: str, filename: str) -> str:
+    """
+    Queue a Markdown to PDF conversion in a background worker process.
+
+    Use this instead of save_markdown_to_pdf for long documents: the call
+    returns immediately with a job id that can be passed to job_status and
+    job_result.
+
+    Args:
+        markdown_content: The Markdown text to convert to PDF
+        filename: Name of the output PDF file (e.g., "document.pdf")
+
+    Returns:
+        The job id and output path, or an error message
+    """
+    target_dir = DEFAULT_OUTPUT_DIR
+    try:
+        if not isinstance(markdown_content, str):
+            return f"Error: markdown_content must be a string, got {type(markdown_content).__name__}"
 
         try:
-            doc.build(story)
-        except AttributeError as e:
-            if 'decode' in str(e):
-                return f"Error: Type mismatch during PDF generation. {str(e)}. One of the story elements has an unexpected type."
-            raise
+            full_path = resolve_output_path(filename)
+        except ValueError as e:
+            return f"Error: {e}"
+
+        job_id = uuid.uuid4().hex[:12]
+        future = _submit(_run_pdf_job, job_id, markdown_content, full_path)
+        _jobs[job_id] = PdfJob(job_id=job_id, path=full_path, future=future, submitted_at=time.time())
+        _update_jobs()
 
-        return f"Success: PDF saved to {full_path}"
+        return f"Submitted: job {job_id} will write {full_path}"
 
-    except PermissionError as e:
-        return f"Error: Permission denied when writing to '{target_dir}': {str(e)}"
-    except OSError as e:
-        return f"Error: OS error occurred: {str(e)}"
     except Exception as e:
-        return f"Error: Failed to convert Markdown to PDF: {str(e)}"
+        return describe_error(e, target_dir)
+
+
+@mcp.tool()
+def job_status(job_id: str) -> str:
+    """
+    Report the state of a background PDF job.
+
+    Returns:
+        Job id, status (queued, running, done or failed), pages rendered so
+        far, elapsed seconds and output path
+    """
+    _update_jobs()
+    job = _jobs.get(job_id)
+    if job is None:
+        return f"Error: unknown job id {job_id!r}"
+    return _format_job(job)
+
+
+@mcp.tool()
+async def job_result(job_id: str, wait_seconds: float = 0) -> str:
+    """
+    Return the result of a background PDF job.
+
+    Args:
+        job_id: Id returned by submit_pdf_job
+        wait_seconds: How long to wait for an unfinished job (default: don't wait)
+
+    Returns:
+        The conversion result message, or the job status if it is still running
+    """
+    _update_jobs()
+    job = _jobs.get(job_id)
+    if job is None:
+        return f"Error: unknown job id {job_id!r}"
+
+    if not job.future.done() and wait_seconds > 0:
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+        _update_jobs()
+
+    if not job.future.done():
+        return _format_job(job)
+    return job.result
+
+
+@mcp.tool()
+async def batch_markdown_to_pdf(
+    input_paths: Optional[list[str]] = None,
+    input_dir: Optional[str] = None,
+    pattern: str = "*.md",
+    recursive: bool = False,
+) -> str:
+    """
+    Convert many Markdown files to PDF in one call.
+
+    Each input file is written to the output directory as <name>.pdf. Files
+    are spread across the worker processes used for background jobs; a
+    failing file is reported and the rest of the batch carries on.
+
+    Args:
+        input_paths: Markdown files to convert
+        input_dir: Directory to take Markdown files from (combined with input_paths)
+        pattern: Glob pattern for files in input_dir (default: "*.md")
+        recursive: Also search subdirectories of input_dir
+
+    Returns:
+        A summary line followed by one tab-separated line per file:
+        status, seconds, input path and output path or error message
+    """
+    started = time.perf_counter()
+    sources = [Path(p).expanduser() for p in (input_paths or [])]
+
+    if input_dir is not None:
+        directory = Path(input_dir).expanduser()
+        if not directory.is_dir():
+            return f"Error: Input directory '{input_dir}' does not exist or is not a directory"
+        matches = directory.rglob(pattern) if recursive else directory.glob(pattern)
+        sources.extend(sorted(p for p in matches if p.is_file()))
+
+    if not sources:
+        return "Error: No input files given"
+
+    results = []
+    pairs = []
+    outputs = {}
+    for source in sources:
+        try:
+            target = resolve_output_path(source.stem)
+        except ValueError as e:
+            results.append((str(source), f"Error: {e}", 0.0))
+            continue
+        except Exception as e:
+            results.append((str(source), describe_error(e, DEFAULT_OUTPUT_DIR), 0.0))
+            continue
+        if target in outputs:
+            results.append((str(source), f"Error: Output {target.name} would overwrite the PDF for {outputs[target]}", 0.0))
+            continue
+        outputs[target] = source
+        pairs.append((str(source), target))
+
+    # Several small files per task keep inter-process overhead low
+    chunk_size = max(1, min(32, -(-len(pairs) // (PDF_WORKERS * 4))))
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    futures = [asyncio.wrap_future(_submit(_convert_files, chunk)) for chunk in chunks]
+    for chunk, outcome in zip(chunks, await asyncio.gather(*futures, return_exceptions=True)):
+        if isinstance(outcome, BaseException):
+            # The task itself failed (e.g. its worker died): fail just its files
+            message = describe_error(outcome, DEFAULT_OUTPUT_DIR)
+            results.extend((source, message, 0.0) for source, _ in chunk)
+        else:
+            results.extend(outcome)
+
+    failed = sum(1 for _, message, _ in results if not message.startswith("Success"))
+    lines = [
+        f"Batch: {len(results) - failed} converted, {failed} failed "
+        f"in {time.perf_counter() - started:.2f}s"
+    ]
+    for source, message, seconds in results:
+        if message.startswith("Success: PDF saved to "):
+            lines.append(f"ok\t{seconds:.3f}\t{source}\t{message[len('Success: PDF saved to '):]}")
+        else:
+            lines.append(f"failed\t{seconds:.3f}\t{source}\t{message}")
+    return "\n".join(lines)
 
 
 def main() -> None:
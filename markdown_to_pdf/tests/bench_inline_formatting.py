@@ -0,0 +1,96 @@
+"""Micro-benchmark: single-pass inline formatter vs. the previous regex passes.
+
+Run from the ``markdown_to_pdf`` directory:
+
+    python tests/bench_inline_formatting.py [--repeat 5]
+
+The legacy implementation is kept here verbatim as the reference point. Both
+implementations must agree on the benchmark corpus before anything is timed.
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+# Ensure the package source is importable without installation
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from markdown_to_pdf.server import escape_html, process_inline_formatting
+
+
+def legacy_process_inline_formatting(text):
+    """Previous implementation: eight sequential ``re.sub`` passes."""
+    text = escape_html(text)
+
+    code_spans = []
+
+    def _store_code(match):
+        code_spans.append(match.group(1))
+        return f"{{{{CODE_{len(code_spans) - 1}}}}}"
+
+    text = re.sub(r'`([^`]+)`', _store_code, text)
+    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
+    text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', text)
+
+    def _italicize_underscore(match):
+        start, end = match.span()
+        prev_char = match.string[start - 1] if start > 0 else ''
+        next_char = match.string[end] if end < len(match.string) else ''
+        if prev_char and prev_char.isalnum():
+            return match.group(0)
+        if next_char and next_char.isalnum():
+            return match.group(0)
+        return f"<i>{match.group(1)}</i>"
+
+    text = re.sub(r'_(.+?)_', _italicize_underscore, text)
+    text = re.sub(r'\[(.+?)\]\((.+?)\)', r'<link href="\2" color="blue"><u>\1</u></link>', text)
+    text = re.sub(r'~~(.+?)~~', r'<strike>\1</strike>', text)
+
+    for index, code in enumerate(code_spans):
+        text = text.replace(
+            f"{{{{CODE_{index}}}}}",
+            f'<font name="Courier" backColor="#f6f8fa">{code}</font>',
+        )
+
+    return text
+
+
+CORPUS = {
+    "plain prose": "Plain prose without any inline markup, just words and commas. " * 60,
+    "mixed markup": (
+        "Some **bold** text with *italics*, `code_span`, a [link](https://example.com/a_b) "
+        "and snake_case names, plus ~~struck~~ words and __strong__ ones. "
+    ) * 60,
+    "identifiers": "call my_function(arg_one, arg_two) on some_object.attr_name now " * 60,
+    "short item": "A short list item with **one** emphasis",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'case':<14}{'chars':>8}{'legacy ms':>12}{'single ms':>12}{'speedup':>10}")
+    for name, text in CORPUS.items():
+        if legacy_process_inline_formatting(text) != process_inline_formatting(text):
+            raise SystemExit(f"implementations disagree on {name!r}")
+
+        legacy = min(timeit.repeat(
+            lambda: legacy_process_inline_formatting(text), number=args.number, repeat=args.repeat
+        )) / args.number
+        single = min(timeit.repeat(
+            lambda: process_inline_formatting(text), number=args.number, repeat=args.repeat
+        )) / args.number
+        print(f"{name:<14}{len(text):>8}{legacy * 1e3:>12.3f}{single * 1e3:>12.3f}{legacy / single:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
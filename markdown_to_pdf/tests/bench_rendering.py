@@ -0,0 +1,140 @@
+"""Rendering benchmark: per-stage timings over a fixed Markdown corpus.
+
+Run from the ``markdown_to_pdf`` directory:
+
+    python tests/bench_rendering.py --save baseline.json   # record a baseline
+    python tests/bench_rendering.py --baseline baseline.json
+
+Every case is rendered to memory with a cold block cache, and the fastest of
+``--repeat`` runs is kept per stage. With ``--baseline`` the runner exits with
+status 1 when any case's total time grows by more than ``--tolerance``.
+Baselines are machine specific, so record one before changing the code.
+"""
+
+import argparse
+import json
+import sys
+from io import BytesIO
+from pathlib import Path
+
+# Ensure the package source is importable without installation
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from markdown_to_pdf.server import PROFILE_STAGES, RenderProfile, build_pdf, clear_block_cache
+
+
+def long_prose(scale=1.0):
+    """Headed sections of distinct paragraphs with inline markup."""
+    paragraph = (
+        "Rendering **throughput** depends on *many* factors, such as `block_cache` hits, "
+        "[links](https://example.com/docs_page) and ~~struck~~ words, plus snake_case names "
+        "that must stay untouched. "
+    ) * 4
+    parts = []
+    for i in range(int(400 * scale)):
+        if i % 20 == 0:
+            parts.append(f"## Section {i // 20 + 1}")
+        parts.append(f"Paragraph {i}. {paragraph}")
+    return "\n\n".join(parts)
+
+
+def huge_table(scale=1.0):
+    """One table long enough to use the large-table mode."""
+    rows = [
+        f"| {i} | item-{i:05d} | {i * 37 % 1000}.{i % 100:02d} | status {'ok' if i % 3 else 'late'} |"
+        for i in range(int(3000 * scale))
+    ]
+    return "\n".join(["| Id | Name | Amount | Notes |", "| -- | ---- | ------ | ----- |", *rows])
+
+
+def many_code_blocks(scale=1.0):
+    """Short paragraphs interleaved with fenced code blocks."""
+    code = "\n".join(f"    result_{n} = compute(value_{n}, flag=True)  # step {n}" for n in range(15))
+    parts = []
+    for i in range(int(300 * scale)):
+        parts.append(f"Example {i} calls `compute` repeatedly:")
+        parts.append(f"```python\ndef example_{i}():\n{code}\n```")
+    return "\n\n".join(parts)
+
+
+def deep_lists(scale=1.0):
+    """Long bullet and numbered lists with indented sub-items."""
+    parts = []
+    for i in range(int(150 * scale)):
+        items = []
+        for depth in range(6):
+            indent = "  " * depth
+            items.append(f"{indent}- Level {depth} item with **bold** and `code` in list {i}")
+        items.extend(f"{n}. Numbered *step* {n} of list {i}" for n in range(1, 7))
+        parts.append("\n".join(items))
+    return "\n\n".join(parts)
+
+
+CORPUS = {
+    "long prose": long_prose,
+    "huge table": huge_table,
+    "code blocks": many_code_blocks,
+    "deep lists": deep_lists,
+}
+
+
+def profile_case(markdown_text, repeat=3):
+    """Render markdown_text ``repeat`` times and return the best time per stage."""
+    best = None
+    for _ in range(repeat):
+        clear_block_cache()
+        profile = RenderProfile()
+        error = build_pdf(markdown_text, BytesIO(), profile=profile)
+        if error:
+            raise RuntimeError(error)
+        timings = dict(profile.timings)
+        timings['total'] = sum(timings.values())
+        best = timings if best is None else {name: min(best[name], timings[name]) for name in best}
+    best['pages'] = profile.pages
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the corpus size")
+    parser.add_argument("--save", type=Path, help="Write the results as a JSON baseline")
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown of a case's total time (default 25%%)")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+    if baseline and baseline.get("scale") != args.scale:
+        raise SystemExit(f"Baseline was recorded with --scale {baseline.get('scale')}")
+    results = {}
+    regressions = []
+
+    header = f"{'case':<13}{'pages':>6}" + "".join(f"{name:>9}" for name in (*PROFILE_STAGES, "total"))
+    print(header + ("  vs baseline" if baseline else ""))
+    for name, generate in CORPUS.items():
+        result = profile_case(generate(args.scale), repeat=args.repeat)
+        results[name] = result
+
+        row = f"{name:<13}{result['pages']:>6}"
+        row += "".join(f"{result[stage] * 1e3:>9.1f}" for stage in (*PROFILE_STAGES, "total"))
+        if name in baseline:
+            ratio = result['total'] / baseline[name]['total']
+            row += f"  {ratio:>6.2f}x"
+            if ratio > 1 + args.tolerance:
+                regressions.append(name)
+        print(row)
+
+    print("(times in ms)")
+    if args.save:
+        args.save.write_text(json.dumps({"scale": args.scale, **results}, indent=2))
+        print(f"Saved baseline to {args.save}")
+    if regressions:
+        raise SystemExit(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import sys
+import time
 from pathlib import Path
 
 import pytest
@@ -61,3 +62,33 @@ def test_process_inline_formatting_handles_italicized_phrase_with_spaces():
     text = "Surround _this phrase_ but keep context."
     expected = "Surround <i>this phrase</i> but keep context."
     assert process_inline_formatting(text) == expected
+
+
+@pytest.mark.parametrize(
+    "markdown, expected",
+    [
+        (
+            "**bold with *nested* italics**",
+            "<b>bold with <i>nested</i> italics</b>",
+        ),
+        (
+            "*see `a*b` here*",
+            "<i>see <font name=\"Courier\" backColor=\"#f6f8fa\">a*b</font> here</i>",
+        ),
+        (
+            "[**Docs**](https://example.com)",
+            "<link href=\"https://example.com\" color=\"blue\"><u><b>Docs</b></u></link>",
+        ),
+        ("a < b & c", "a &lt; b &amp; c"),
+    ],
+)
+def test_process_inline_formatting_handles_nesting(markdown, expected):
+    assert process_inline_formatting(markdown) == expected
+
+
+@pytest.mark.parametrize("text", ["[" * 20000, "[a](" * 5000, "[x](" + "a" * 20000])
+def test_process_inline_formatting_unmatched_brackets_stay_fast(text):
+    """Runs of brackets that never form a link must not rescan the line for every '['."""
+    start = time.perf_counter()
+    assert process_inline_formatting(text) == text
+    assert time.perf_counter() - start < 1.0
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+# Ensure the package source is importable without installation
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from markdown_to_pdf import server
+
+
+def test_pdf_job_renders_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(tmp_path))
+
+    submitted = server.submit_pdf_job("# Report\n\nBackground *rendering*.", "report")
+    assert submitted.startswith("Submitted: job ")
+    job_id = submitted.split()[2]
+
+    result = asyncio.run(server.job_result(job_id, wait_seconds=120))
+
+    assert result == f"Success: PDF saved to {tmp_path / 'report.pdf'}"
+    assert (tmp_path / "report.pdf").read_bytes().startswith(b"%PDF")
+
+    status = server.job_status(job_id)
+    assert "status: done" in status
+    assert "pages_rendered: 1" in status
+
+
+def test_pdf_job_rejects_invalid_filename(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(tmp_path))
+
+    result = server.submit_pdf_job("# Report", "../escape.pdf")
+
+    assert result == "Error: Invalid filename. Filename cannot contain path separators"
+
+
+def test_job_status_unknown_job():
+    assert server.job_status("nope") == "Error: unknown job id 'nope'"
+
+
+def test_batch_markdown_to_pdf_reports_each_file(tmp_path, monkeypatch):
+    source_dir = tmp_path / "notes"
+    source_dir.mkdir()
+    (source_dir / "first.md").write_text("# First\n\nHello.", encoding="utf-8")
+    (source_dir / "second.md").write_text("- one\n- two", encoding="utf-8")
+    (source_dir / "broken.md").write_bytes(b"\xff\xfe not utf-8")
+    output_dir = tmp_path / "out"
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(output_dir))
+
+    result = asyncio.run(server.batch_markdown_to_pdf(input_dir=str(source_dir)))
+
+    summary, *rows = result.splitlines()
+    assert summary.startswith("Batch: 2 converted, 1 failed in ")
+    statuses = {Path(row.split("\t")[2]).name: row.split("\t")[0] for row in rows}
+    assert statuses == {"broken.md": "failed", "first.md": "ok", "second.md": "ok"}
+    assert sorted(p.name for p in output_dir.iterdir()) == ["first.pdf", "second.pdf"]
+
+
+def test_worker_pool_is_replaced_after_a_worker_dies(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(tmp_path))
+
+    crashed = server._submit(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        crashed.result(timeout=120)
+
+    submitted = server.submit_pdf_job("# After the crash", "after")
+    assert submitted.startswith("Submitted: job ")
+    result = asyncio.run(server.job_result(submitted.split()[2], wait_seconds=120))
+    assert result == f"Success: PDF saved to {tmp_path / 'after.pdf'}"
+
+
+def test_batch_keeps_results_when_a_task_fails(tmp_path, monkeypatch):
+    source_dir = tmp_path / "notes"
+    source_dir.mkdir()
+    for name in ("a", "b", "c"):
+        (source_dir / f"{name}.md").write_text(f"# {name}", encoding="utf-8")
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(tmp_path / "out"))
+    monkeypatch.setattr(server, "PDF_WORKERS", 4)
+
+    real_submit = server._submit
+    submitted = []
+
+    def submit(fn, chunk):
+        submitted.append(chunk)
+        if len(submitted) == 1:
+            failed = Future()
+            failed.set_exception(BrokenProcessPool("worker died"))
+            return failed
+        return real_submit(fn, chunk)
+
+    monkeypatch.setattr(server, "_submit", submit)
+    result = asyncio.run(server.batch_markdown_to_pdf(input_dir=str(source_dir)))
+
+    summary, *rows = result.splitlines()
+    assert summary.startswith("Batch: 2 converted, 1 failed in ")
+    assert rows[0].startswith("failed\t0.000\t") and rows[0].endswith("a.md\tError: Failed to convert Markdown to PDF: worker died")
+    assert [row.split("\t")[0] for row in rows[1:]] == ["ok", "ok"]
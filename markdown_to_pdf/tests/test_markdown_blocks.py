@@ -1,8 +1,9 @@
 import sys
+from io import BytesIO
 from pathlib import Path
 
 import pytest
-from reportlab.platypus import ListFlowable, Paragraph, Preformatted, Table
+from reportlab.platypus import ListFlowable, Paragraph, Preformatted, SimpleDocTemplate, Table
 
 # Ensure the package source is importable without installation
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -10,7 +11,14 @@ SRC_PATH = PROJECT_ROOT / "src"
 if str(SRC_PATH) not in sys.path:
     sys.path.insert(0, str(SRC_PATH))
 
-from markdown_to_pdf.server import markdown_to_reportlab
+from markdown_to_pdf import server
+from markdown_to_pdf.server import (
+    StreamingStory,
+    classify_line,
+    iter_story,
+    markdown_to_reportlab,
+    split_markdown_blocks,
+)
 
 
 def _collect_story_items(story, cls):
@@ -138,3 +146,128 @@ def test_markdown_to_reportlab_renders_code_block():
 
     code_block = code_blocks[0]
     assert code_block.lines == ["print('hi')", "return 1"]
+
+
+def test_split_markdown_blocks_keeps_code_fences_together():
+    blocks = split_markdown_blocks("para\n\n```\na\n\nb\n```\ntail")
+
+    assert blocks == ["para", "", "```\na\n\nb\n```\ntail"]
+
+
+def test_markdown_to_reportlab_reuses_cached_blocks(monkeypatch):
+    server.clear_block_cache()
+    calls = []
+    original = server.process_inline_formatting
+
+    def counting_formatter(text):
+        calls.append(text)
+        return original(text)
+
+    monkeypatch.setattr(server, "process_inline_formatting", counting_formatter)
+
+    first = markdown_to_reportlab("# Title\n\nFirst *paragraph*.\n\nSecond paragraph.")
+    assert len(calls) == 3
+
+    calls.clear()
+    second = markdown_to_reportlab("# Title\n\nFirst *paragraph*.\n\nEdited paragraph.")
+
+    assert calls == ["Edited paragraph."]
+    assert [element.text for element in _collect_story_items(second, Paragraph)][:2] == [
+        element.text for element in _collect_story_items(first, Paragraph)
+    ][:2]
+    # Cached blocks are handed out as fresh flowables on every render
+    assert second[0] is not first[0]
+
+
+@pytest.mark.parametrize(
+    "line, kind",
+    [
+        ("```python", "fence"),
+        ("## Heading", "header"),
+        ("  ---  ", "hr"),
+        ("  * item", "bullet"),
+        ("12. item", "number"),
+        ("> quote", "blockquote"),
+        ("  | a | b |", "table"),
+        ("   ", "blank"),
+        ("####### not a heading", "text"),
+    ],
+)
+def test_classify_line(line, kind):
+    assert classify_line(line)[0] == kind
+
+
+def test_markdown_to_reportlab_uses_shared_styles():
+    server.clear_block_cache()
+    story = markdown_to_reportlab("# Title\n\nBody text.")
+
+    paragraphs = _collect_story_items(story, Paragraph)
+    assert paragraphs[0].style is server.STYLES["CustomH1"]
+    assert paragraphs[1].style is server.STYLES["CustomBody"]
+
+
+def test_markdown_to_reportlab_chunks_large_tables(monkeypatch):
+    monkeypatch.setattr(server, "LARGE_TABLE_ROWS", 10)
+    server.clear_block_cache()
+    rows = "\n".join(f"| {i} | value {i} |" for i in range(200))
+    story = markdown_to_reportlab(f"| Id | Value |\n| -- | ----- |\n{rows}")
+
+    assert len(story) == 1
+    chunked = story[0]
+    assert isinstance(chunked, server.ChunkedTable)
+
+    first, rest = chunked.split(400, 300)
+    assert isinstance(first, Table)
+    assert [cell[0].getPlainText() for cell in first._cellvalues[0]] == ["Id", "Value"]
+    # Short cells are plain strings rather than Paragraphs
+    assert first._cellvalues[1] == ["0", "value 0"]
+    # ... set in the same font and size as wrapped cells
+    body = server.STYLES['CustomBody']
+    cell_style = first._cellStyles[1][0]
+    assert (cell_style.fontname, cell_style.fontsize, cell_style.leading) == (body.fontName, body.fontSize, body.leading)
+    assert rest.start == len(first._cellvalues) - 1
+
+    # Cached large tables can be laid out more than once
+    for _ in range(2):
+        doc = SimpleDocTemplate(BytesIO())
+        doc.build(markdown_to_reportlab(f"| Id | Value |\n| -- | ----- |\n{rows}"))
+        assert doc.page > 1
+
+
+def test_streaming_story_parses_blocks_as_pages_are_laid_out():
+    markdown = "\n\n".join(f"Paragraph {i} with **bold** text." for i in range(600))
+    produced = []
+
+    def counting(flowables):
+        for flowable in flowables:
+            produced.append(flowable)
+            yield flowable
+
+    seen_at_first_page = []
+    doc = SimpleDocTemplate(BytesIO())
+    doc.build(
+        StreamingStory(counting(iter_story(markdown))),
+        onFirstPage=lambda canvas, doc: seen_at_first_page.append(len(produced)),
+    )
+
+    assert len(produced) == len(markdown_to_reportlab(markdown))
+    assert doc.page > 10
+    assert seen_at_first_page[0] < len(produced) / 5
+
+
+def test_large_table_with_one_wide_column_keeps_narrow_columns(monkeypatch):
+    monkeypatch.setattr(server, "LARGE_TABLE_ROWS", 10)
+    server.clear_block_cache()
+    text = "lorem ipsum dolor sit amet " * 40
+    rows = "\n".join(f"| {i} | x | {text} |" for i in range(50))
+    markdown = f"| Id | Flag | Notes |\n| -- | -- | -- |\n{rows}"
+
+    chunked = markdown_to_reportlab(markdown)[0]
+    widths = chunked._column_widths(400)
+    assert sum(widths) <= 400
+    expected = [max(w, server.TABLE_MIN_COLUMN_WIDTH) for w in chunked.natural_widths[:2]]
+    assert widths[:2] == pytest.approx(expected, abs=0.01)
+
+    doc = SimpleDocTemplate(BytesIO())
+    doc.build(markdown_to_reportlab(markdown))
+    assert doc.page > 1
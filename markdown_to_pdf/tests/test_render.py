@@ -0,0 +1,76 @@
+import asyncio
+import base64
+import sys
+from io import BytesIO
+from pathlib import Path
+
+# Ensure the package source is importable without installation
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_PATH = PROJECT_ROOT / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
+
+from mcp.types import EmbeddedResource
+
+from markdown_to_pdf import server
+
+
+def test_render_markdown_to_pdf_returns_base64(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(tmp_path))
+
+    result = server.render_markdown_to_pdf("# In memory\n\nNo *disk* needed.")
+
+    assert base64.b64decode(result).startswith(b"%PDF")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_render_markdown_to_pdf_as_blob_resource():
+    content = asyncio.run(
+        server.mcp.call_tool(
+            "render_markdown_to_pdf",
+            {"markdown_content": "# Resource", "filename": "my report", "as_resource": True},
+        )
+    )
+
+    assert len(content) == 1
+    assert isinstance(content[0], EmbeddedResource)
+    resource = content[0].resource
+    assert resource.mimeType == "application/pdf"
+    assert str(resource.uri) == "memory://markdown-to-pdf/my%20report.pdf"
+    assert base64.b64decode(resource.blob).startswith(b"%PDF")
+
+
+def test_render_markdown_to_pdf_enforces_size_cap():
+    result = server.render_markdown_to_pdf("# Too big", max_bytes=100)
+
+    assert result.startswith("Error: PDF is ")
+    assert "more than max_bytes (100)" in result
+
+
+def test_save_markdown_to_pdf_profile_reports_stages(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_OUTPUT_DIR", str(tmp_path))
+    server.clear_block_cache()
+    content = "# Profiled\n\nSome **bold** text.\n\n- one\n- two"
+
+    result = server.save_markdown_to_pdf(content, "profiled", profile=True)
+
+    message, report = result.split("\n\n", 1)
+    assert message == f"Success: PDF saved to {tmp_path / 'profiled.pdf'}"
+    for stage in server.PROFILE_STAGES:
+        assert f"  {stage} " in report
+    assert "Blocks: 3 (0 from cache)" in report
+    assert "Flowables: Paragraph 2, Spacer 2, ListFlowable 1" in report
+    assert report.endswith("Pages: 1")
+
+    # Without profiling the message is unchanged
+    assert server.save_markdown_to_pdf(content, "plain") == f"Success: PDF saved to {tmp_path / 'plain.pdf'}"
+
+
+def test_build_pdf_reports_pages_once_drawn(monkeypatch):
+    server.clear_block_cache()
+    events = []
+    draw = server.Paragraph.drawOn
+    monkeypatch.setattr(server.Paragraph, "drawOn", lambda self, *args, **kwargs: events.append("draw") or draw(self, *args, **kwargs))
+
+    assert server.build_pdf("Hello.", BytesIO(), on_page=events.append) is None
+    assert events == ["draw", 1]